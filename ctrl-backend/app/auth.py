@@ -1,10 +1,70 @@
+import random
+import threading
+
 from fastapi import Header, HTTPException, Depends
-from firebase_admin import auth
-import firebase_admin
+from jose import jwt
+
+from app.core.config import settings
+from app.services.firebase_keys import FirebaseKeyStore
+from app.services.token_cache import TokenCache
+from app.utils.ttl_cache import TTLCache
+
+_firebase_lock = threading.Lock()
+
+
+def firebase_auth():
+    """
+    The firebase_admin.auth module, initializing the SDK on first use.
+
+    firebase_admin pulls in google-auth and friends, which dominate import
+    time; with local key verification most processes never need it.
+    """
+    import firebase_admin
+    from firebase_admin import auth
+
+    # Only initialize Firebase once
+    if not firebase_admin._apps:
+        with _firebase_lock:
+            if not firebase_admin._apps:
+                firebase_admin.initialize_app()
+    return auth
+
+token_cache = TokenCache(max_size=settings.FIREBASE_TOKEN_CACHE_SIZE)
+
+# uid -> auth_time of the newest sign-in seen revoked by a sampled check.
+# Tokens from that sign-in or earlier are refused on every request, not
+# just the sampled one. ID tokens live an hour and revoked sessions can't
+# mint new ones, so entries can expire after that.
+revoked_sessions = TTLCache(max_size=settings.FIREBASE_TOKEN_CACHE_SIZE, ttl=3600)
+
+key_store = FirebaseKeyStore(
+    project_id=settings.FIREBASE_PROJECT_ID,
+    source=settings.FIREBASE_CERTS_URL,
+    cache_path=settings.FIREBASE_CERTS_CACHE_PATH,
+    refresh_margin=settings.FIREBASE_CERTS_REFRESH_MARGIN,
+)
+
+
+def _invalid_token() -> HTTPException:
+    return HTTPException(
+        status_code=401,
+        detail="Invalid or expired Firebase ID token"
+    )
+
+
+def _session_revoked(claims: dict) -> bool:
+    cutoff = revoked_sessions.get(claims.get("uid"))
+    return cutoff is not None and claims.get("auth_time", 0) <= cutoff
+
+
+def _record_revocation(token: str) -> None:
+    # Firebase checked the signature before reporting the revocation, so
+    # the unverified claims are trustworthy here (and only used to refuse).
+    claims = jwt.get_unverified_claims(token)
+    uid, auth_time = claims.get("sub"), claims.get("auth_time", 0)
+    if uid:
+        revoked_sessions.put(uid, max(auth_time, revoked_sessions.get(uid) or 0))
 
-# Only initialize Firebase once
-if not firebase_admin._apps:
-    firebase_admin.initialize_app()
 
 def verify_token(authorization: str = Header(None)):
     if not authorization:
@@ -24,11 +84,31 @@ def verify_token(authorization: str = Header(None)):
 
     token = parts[1]
 
+    # Revocation can only be seen by asking Firebase, so a sample of
+    # requests skips the cache and re-verifies with check_revoked.
+    check_revoked = random.random() < settings.FIREBASE_REVOCATION_SAMPLE_RATE
+
+    cached = token_cache.get(token)
+    if cached is not None and not check_revoked:
+        if _session_revoked(cached):
+            token_cache.discard(token)
+            raise _invalid_token()
+        return cached
+
     try:
-        decoded_token = auth.verify_id_token(token)
-        return decoded_token  # contains uid, email, etc.
+        if key_store.ready and not check_revoked:
+            decoded_token = key_store.verify_id_token(token)
+        else:
+            decoded_token = firebase_auth().verify_id_token(token, check_revoked=check_revoked)
     except Exception as e:
-        raise HTTPException(
-            status_code=401,
-            detail="Invalid or expired Firebase ID token"
-        )
+        token_cache.discard(token)
+        auth = firebase_auth() if check_revoked else None
+        if auth is not None and isinstance(e, (auth.RevokedIdTokenError, auth.UserDisabledError)):
+            _record_revocation(token)
+        raise _invalid_token()
+
+    if _session_revoked(decoded_token):
+        raise _invalid_token()
+
+    token_cache.put(token, decoded_token)
+    return decoded_token  # contains uid, email, etc.
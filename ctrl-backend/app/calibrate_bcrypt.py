@@ -0,0 +1,16 @@
+import argparse
+
+from app.core.config import settings
+from app.services.security import calibrate_bcrypt_rounds
+
+parser = argparse.ArgumentParser(description="Find the bcrypt cost that fits a target hash time on this CPU.")
+parser.add_argument("--target-ms", type=float, default=settings.BCRYPT_TARGET_MS)
+parser.add_argument("--min-rounds", type=int, default=settings.BCRYPT_MIN_ROUNDS)
+parser.add_argument("--max-rounds", type=int, default=settings.BCRYPT_MAX_ROUNDS)
+args = parser.parse_args()
+
+print(f"Timing bcrypt (target {args.target_ms:g}ms)...")
+rounds, timings = calibrate_bcrypt_rounds(args.target_ms, args.min_rounds, args.max_rounds)
+for cost, ms in timings.items():
+    print(f"  cost {cost:2d}: {ms:8.1f}ms{'  <-' if cost == rounds else ''}")
+print(f"BCRYPT_ROUNDS={rounds}")
@@ -12,12 +12,140 @@ class Settings:
 
     DATABASE_URL = os.getenv("DATABASE_URL")
 
+    # Connection pool, applied to both the sync and async engines.
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds, -1 disables
+    # Pre-ping costs a round trip per checkout; recycle alone is usually enough.
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+    # GET /moods page size (keyset-paginated, newest first).
+    MOODS_PAGE_DEFAULT = int(os.getenv("MOODS_PAGE_DEFAULT", "100"))
+    MOODS_PAGE_MAX = int(os.getenv("MOODS_PAGE_MAX", "500"))
+
+    # Largest batch accepted by POST /moods/batch.
+    MOODS_BATCH_MAX = int(os.getenv("MOODS_BATCH_MAX", "500"))
+
+    # Group commit for POST /moods: concurrent check-ins arriving within the
+    # window (or until MAX_ROWS) share one INSERT and one COMMIT.
+    MOODS_GROUP_COMMIT = os.getenv("MOODS_GROUP_COMMIT", "false").lower() == "true"
+    MOODS_GROUP_COMMIT_WINDOW_MS = float(os.getenv("MOODS_GROUP_COMMIT_WINDOW_MS", "5"))
+    MOODS_GROUP_COMMIT_MAX_ROWS = int(os.getenv("MOODS_GROUP_COMMIT_MAX_ROWS", "100"))
+
+    # Rows fetched per round trip by the streaming mood export.
+    MOODS_EXPORT_BATCH_SIZE = int(os.getenv("MOODS_EXPORT_BATCH_SIZE", "1000"))
+    # Monthly mood_entries partitions (PostgreSQL), kept up by app/partition_moods.py:
+    # months created ahead of time, and how many months of entries to keep
+    # (0 keeps everything). Expired months are moved to MOODS_ARCHIVE_SCHEMA
+    # with MOODS_RETENTION_ACTION=archive, or dropped with "drop". Entries
+    # sent with a created_at before the retention window are rejected.
+    MOODS_PARTITION_PREMAKE = int(os.getenv("MOODS_PARTITION_PREMAKE", "3"))
+    MOODS_RETENTION_MONTHS = int(os.getenv("MOODS_RETENTION_MONTHS", "0"))
+    MOODS_RETENTION_ACTION = os.getenv("MOODS_RETENTION_ACTION", "archive")
+    MOODS_ARCHIVE_SCHEMA = os.getenv("MOODS_ARCHIVE_SCHEMA", "archive")
+
+    # Logging: JSON lines written from a background thread via a bounded queue.
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # Per-route sampling for access and api_call logs, e.g. "/api/v1/health=0.01,/api/v1/moods=0.1"
+    LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+
+    # Required (as X-Internal-Token) by /internal/* and /metrics; while it is
+    # unset those endpoints answer 404.
+    INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
+
+    # Driver used for the async engine; the sync engine keeps DATABASE_URL
+    # as-is for Alembic and scripts. ASYNC_DATABASE_URL overrides both.
+    DATABASE_ASYNC_DRIVER = os.getenv("DATABASE_ASYNC_DRIVER", "asyncpg")  # "asyncpg" or "psycopg"
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
     SECRET_KEY = os.getenv("SECRET_KEY", "change_me_in_env")
     ALGORITHM = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
+    # Authenticated users are cached by id so get_current_user can skip
+    # the per-request SELECT. Entries are dropped on ORM update/delete.
+    PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+    PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+    # Firebase uid -> user id, so Firebase-authenticated routes skip that SELECT.
+    FIREBASE_UID_CACHE_TTL = int(os.getenv("FIREBASE_UID_CACHE_TTL", "3600"))
+    # Build the principal from the access token's claims instead of the DB.
+    # Revocation then relies on the token_version map below, refreshed every
+    # TOKEN_VERSION_REFRESH seconds, so it takes effect within that window
+    # on other instances (immediately on the one that revoked).
+    STATELESS_PRINCIPAL = os.getenv("STATELESS_PRINCIPAL", "false").lower() == "true"
+    TOKEN_VERSION_REFRESH = float(os.getenv("TOKEN_VERSION_REFRESH", "30"))
+
     FIREBASE_PROJECT_ID = os.getenv("FIREBASE_PROJECT_ID")
 
-settings = Settings()
+    # Verified Firebase ID tokens are cached until their own expiry.
+    FIREBASE_TOKEN_CACHE_SIZE = int(os.getenv("FIREBASE_TOKEN_CACHE_SIZE", "10000"))
+    # Verify ID tokens locally against a cached copy of Google's signing keys.
+    FIREBASE_LOCAL_VERIFY = os.getenv("FIREBASE_LOCAL_VERIFY", "true").lower() == "true"
+    FIREBASE_CERTS_URL = os.getenv(
+        "FIREBASE_CERTS_URL",
+        "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com",
+    )
+    FIREBASE_CERTS_CACHE_PATH = os.getenv(
+        "FIREBASE_CERTS_CACHE_PATH", str(BASE_DIR / ".cache" / "firebase_certs.json")
+    )
+    FIREBASE_CERTS_REFRESH_MARGIN = int(os.getenv("FIREBASE_CERTS_REFRESH_MARGIN", "300"))
+
+    # Fraction of cache hits that are re-verified with a revocation check (0 disables).
+    FIREBASE_REVOCATION_SAMPLE_RATE = float(os.getenv("FIREBASE_REVOCATION_SAMPLE_RATE", "0"))
+
+    # bcrypt runs on its own bounded pool so a login burst cannot take
+    # over the threadpool that every other sync route shares.
+    PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")  # "thread" or "process"
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "16"))
+    PASSWORD_HASH_RETRY_AFTER = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", "1"))
+
+    # bcrypt work factor for new hashes. With BCRYPT_CALIBRATE the app
+    # measures this CPU at startup and picks the highest cost that hashes
+    # within BCRYPT_TARGET_MS instead (python -m app.calibrate_bcrypt shows
+    # the same numbers). Logins rehash any password stored at another cost.
+    # Calibrate once per instance type and pin BCRYPT_ROUNDS, so mixed
+    # hardware in one fleet doesn't rehash users back and forth.
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    BCRYPT_CALIBRATE = os.getenv("BCRYPT_CALIBRATE", "false").lower() == "true"
+    BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS", "100"))
+    BCRYPT_MIN_ROUNDS = int(os.getenv("BCRYPT_MIN_ROUNDS", "10"))
+    BCRYPT_MAX_ROUNDS = int(os.getenv("BCRYPT_MAX_ROUNDS", "16"))
 
-print("DEBUG: DATABASE_URL =", settings.DATABASE_URL)
+    # Token-bucket rate limits ("N/minute", "N/hour", ...; empty disables one).
+    # Checked before any DB or bcrypt work; throttled requests get a 429.
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_SIGNUP_IP = os.getenv("RATE_LIMIT_SIGNUP_IP", "10/hour")
+    RATE_LIMIT_LOGIN_IP = os.getenv("RATE_LIMIT_LOGIN_IP", "30/minute")
+    # Keyed on (client IP, email), so nobody can lock someone else out.
+    RATE_LIMIT_LOGIN_ACCOUNT = os.getenv("RATE_LIMIT_LOGIN_ACCOUNT", "10/minute")
+    RATE_LIMIT_MOODS_WRITE_USER = os.getenv("RATE_LIMIT_MOODS_WRITE_USER", "60/minute")
+    # "memory" (per process), "database" (shared by every worker through the
+    # rate_limit_buckets table) or "module:factory" for another shared store.
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_SHARDS = int(os.getenv("RATE_LIMIT_SHARDS", "16"))
+    RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+    # Idempotency-Key replay for POST /moods and /auth/signup. Responses are
+    # kept in-process; IDEMPOTENCY_DB also shares them (and in-progress
+    # claims) between workers through the idempotency_keys table.
+    IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "86400"))
+    IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+    IDEMPOTENCY_DB = os.getenv("IDEMPOTENCY_DB", "false").lower() == "true"
+    # How long a duplicate waits on another worker before answering 409.
+    IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", "10"))
+    # A pending claim left by a worker that died mid-request is taken over
+    # once this many seconds have passed; completed keys keep IDEMPOTENCY_TTL.
+    # The owner renews its claim every third of the lease while the handler
+    # runs, so slow handlers are not run twice however long they take.
+    IDEMPOTENCY_CLAIM_LEASE = float(os.getenv("IDEMPOTENCY_CLAIM_LEASE", "30"))
+
+    # Startup prewarm (DB pool, hot statements, caches) gating GET /ready.
+    PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "true").lower() == "true"
+    PREWARM_TIMEOUT = float(os.getenv("PREWARM_TIMEOUT", "20"))
+    # Newest accounts loaded into the principal cache at startup (0 disables).
+    PREWARM_PRINCIPALS = int(os.getenv("PREWARM_PRINCIPALS", "500"))
+
+settings = Settings()
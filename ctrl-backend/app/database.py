@@ -1,13 +1,33 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from app.core.config import settings  # FIXED IMPORT
+from app.utils.pool_metrics import PoolMetrics, instrumented_pool_class
+
+sync_pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
+
+
+def pool_options(pool_class, metrics: PoolMetrics) -> dict:
+    return {
+        "poolclass": instrumented_pool_class(pool_class, metrics),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
 
 engine = create_engine(
     settings.DATABASE_URL,
     future=True,
-    pool_pre_ping=True,
+    **pool_options(QueuePool, sync_pool_metrics),
 )
+sync_pool_metrics.listen(engine)
 
 SessionLocal = sessionmaker(
     autoflush=False,
@@ -24,3 +44,38 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# -----------------------------
+# ASYNC ENGINE
+# -----------------------------
+def build_async_url(url: str) -> str:
+    """Point a sync DATABASE_URL at the matching async driver."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+
+    if backend == "postgresql":
+        parsed = parsed.set(drivername=f"postgresql+{settings.DATABASE_ASYNC_DRIVER}")
+    elif backend == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+
+    return parsed.render_as_string(hide_password=False)
+
+
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or build_async_url(settings.DATABASE_URL),
+    **pool_options(AsyncAdaptedQueuePool, async_pool_metrics),
+)
+async_pool_metrics.listen(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,24 +1,58 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import SessionLocal
+from app.core.config import settings
+from app.database import get_async_db
 from app.models.user import User
+from app.services.principal_cache import UserSnapshot, principal_cache
+from app.schemas.auth import TokenData
 from app.services.security import decode_access_token
+from app.services.token_versions import token_versions
+from app.utils.logging import bind_log_context
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
-def get_current_user(
+async def _get_user_by_id(db: AsyncSession, user_id: int) -> User | None:
+    result = await db.execute(select(User).where(User.id == user_id))
+    return result.scalars().first()
+
+
+def _revoked() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token revoked",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _principal_from_claims(token_data: TokenData) -> UserSnapshot | None:
+    """
+    Principal built from the token alone, or None when the DB must be asked.
+
+    Falls back for tokens issued without the principal claims and while
+    the token version map is stale (revocations could be missed).
+    """
+    if token_data.token_version is None or token_data.created_at is None:
+        return None
+    if not token_versions.fresh:
+        return None
+    if token_versions.is_revoked(token_data.user_id, token_data.token_version):
+        raise _revoked()
+    return UserSnapshot(
+        id=token_data.user_id,
+        email=token_data.email,
+        created_at=token_data.created_at,
+        token_version=token_data.token_version,
+    )
+
+
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> User:
+    db: AsyncSession = Depends(get_async_db),
+) -> UserSnapshot:
     token_data = decode_access_token(token)
     if token_data is None or token_data.user_id is None:
         raise HTTPException(
@@ -27,12 +61,26 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = db.query(User).filter(User.id == token_data.user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    bind_log_context(user_id=token_data.user_id)
+
+    if settings.STATELESS_PRINCIPAL:
+        # The session is never used on this path, so no connection is checked out.
+        principal = _principal_from_claims(token_data)
+        if principal is not None:
+            return principal
+
+    snapshot = principal_cache.get(token_data.user_id)
+    if snapshot is None:
+        user = await _get_user_by_id(db, token_data.user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        snapshot = UserSnapshot.from_user(user)
+        principal_cache.put(snapshot.id, snapshot)
 
-    return user
+    if token_data.token_version is not None and token_data.token_version < snapshot.token_version:
+        raise _revoked()
+    return snapshot
@@ -1,5 +1,5 @@
 from app.database import Base, engine
-from app.models import user, mood   # import every model module
+from app.models import user, mood, idempotency, rate_limit   # import every model module
 
 print("Creating tables...")
 Base.metadata.create_all(bind=engine)
@@ -1,19 +1,85 @@
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.routers import auth, health, users, moods
-from app.utils.swagger_oauth_fix import fix_swagger_login
+from app.auth import key_store
+from app.core.config import settings
+from app.prewarm import prewarm, readiness
+from app.services.mood_writer import mood_writer
+from app.services.security import calibrate_password_hashing
+from app.services.token_versions import token_versions
+from app.routers import auth, health, internal, users, moods
+from app.utils.logging import RequestLoggingMiddleware
+from app.utils.metrics import MetricsMiddleware
+from app.utils.etag import etag_matches, not_modified
+from app.utils.swagger_oauth_fix import cached_openapi
+
+logger = logging.getLogger("ctrl-backend")
+
+
+# -----------------------------
+# LIFESPAN
+# -----------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.FIREBASE_LOCAL_VERIFY and settings.FIREBASE_PROJECT_ID:
+        try:
+            await run_in_threadpool(key_store.start)
+        except Exception:
+            # verify_token falls back to firebase_admin until keys load.
+            logger.warning("firebase key store unavailable", exc_info=True)
+    if settings.BCRYPT_CALIBRATE:
+        # Independent of prewarm, so PREWARM_ENABLED=false doesn't skip it.
+        try:
+            rounds, ms = await calibrate_password_hashing()
+            logger.info("bcrypt calibrated", extra={"bcrypt_rounds": rounds, "bcrypt_ms": round(ms, 1)})
+        except Exception:
+            logger.warning(
+                "bcrypt calibration failed, keeping BCRYPT_ROUNDS=%s", settings.BCRYPT_ROUNDS, exc_info=True
+            )
+    if not await prewarm(app):
+        # Keep serving; GET /ready stays 503 and retries the failed steps.
+        logger.warning("prewarm incomplete", extra={"steps": readiness.steps})
+    if settings.STATELESS_PRINCIPAL:
+        # Loaded by prewarm; a failed load is retried by the refresh loop.
+        token_versions.start()
+    yield
+    await token_versions.stop()
+    # Drain queued group-commit writes before the process exits.
+    await mood_writer.stop()
+    key_store.stop()
 
 
-app = FastAPI(title="CTRL Backend")
+app = FastAPI(title="CTRL Backend", lifespan=lifespan)
 
 
 # -----------------------------
 # FIX SWAGGER AUTH LOGIN
 # -----------------------------
+# FastAPI registers its own /openapi.json while constructing the app, which
+# would shadow the handler below. Drop it so the cached schema is served.
+app.router.routes[:] = [
+    route for route in app.router.routes
+    if getattr(route, "path", None) != app.openapi_url
+]
+app.openapi = lambda: cached_openapi(app)[0]
+
+
 @app.get("/openapi.json", include_in_schema=False)
-def overridden_openapi():
-    return fix_swagger_login(app)
+def overridden_openapi(request: Request):
+    _, body, etag = cached_openapi(app)
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, cache_control="no-cache")
+
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
 
 
 # -----------------------------
@@ -29,6 +95,8 @@ app.include_router(health.router, prefix=API_PREFIX, tags=["health"])
 app.include_router(users.router, prefix=API_PREFIX, tags=["users"])
 app.include_router(moods.router, prefix=API_PREFIX, tags=["moods"])
 app.include_router(auth.router, prefix=API_PREFIX, tags=["auth"])
+app.include_router(internal.router)
+app.include_router(internal.metrics_router)
 
 
 # -----------------------------
@@ -40,4 +108,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Request-ID"],
 )
+
+app.add_middleware(RequestLoggingMiddleware)
+app.add_middleware(MetricsMiddleware)
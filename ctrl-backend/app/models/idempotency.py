@@ -0,0 +1,18 @@
+from sqlalchemy import Column, DateTime, Integer, String, Text
+from app.database import Base
+
+class IdempotencyKey(Base):
+    """
+    Shared record of Idempotency-Key requests, for multi-worker setups.
+
+    A row with a NULL status_code is a claim by the request currently
+    running; it is filled in with the response once that succeeds.
+    """
+    __tablename__ = "idempotency_keys"
+
+    # "<scope>:<client key>", e.g. "moods:<firebase uid>:<key>"
+    key = Column(String, primary_key=True)
+    fingerprint = Column(String, nullable=False)
+    status_code = Column(Integer, nullable=True)
+    body = Column(Text, nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -1,11 +1,33 @@
-from sqlalchemy import Column, Integer, String, DateTime, func
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, String, DateTime, Index, func
 from app.database import Base
 
 class MoodEntry(Base):
+    # On PostgreSQL the table is range-partitioned by month on created_at
+    # (migration e8b2c5f0a417, kept up by app/partition_moods.py), with
+    # (id, created_at) as its primary key there. Filtering on created_at
+    # lets the planner skip the months a query can't touch.
     __tablename__ = "mood_entries"
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, index=True)
-    mood = Column(String, index=True)
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer)
+    mood = Column(String)
     note = Column(String, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    mood_score = Column(Integer, nullable=True)
+    energy_level = Column(Integer, nullable=True)
+    stress_level = Column(Integer, nullable=True)
+    # Set in Python so every row carries microseconds: SQLite's CURRENT_TIMESTAMP
+    # has none, and it compares datetimes as text, so keyset cursors over
+    # server-defaulted rows would match their own boundary row again.
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        # Serves every per-user timeline read: filter on user_id, newest first.
+        Index("ix_mood_entries_user_id_created_at", user_id, created_at.desc()),
+    )
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Float, String
+from app.database import Base
+
+class RateLimitBucket(Base):
+    """
+    Token bucket shared by every worker, for RATE_LIMIT_BACKEND=database.
+
+    `updated_at` is wall-clock epoch seconds, since buckets are read and
+    refilled from different hosts.
+    """
+    __tablename__ = "rate_limit_buckets"
+
+    # "<rule>:<key>", e.g. "login_ip:203.0.113.7"
+    key = Column(String, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False, index=True)
@@ -6,6 +6,10 @@ class User(Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True, index=True)
-    email = Column(String, unique=True, index=True, nullable=False)
-    hashed_password = Column(String, nullable=False)
+    # Firebase-authenticated users have no local email/password.
+    email = Column(String, unique=True, index=True, nullable=True)
+    hashed_password = Column(String, nullable=True)
+    firebase_uid = Column(String, unique=True, index=True, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Bumped to revoke every access token issued before; tokens carry it as "ver".
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
@@ -0,0 +1,38 @@
+import argparse
+from datetime import datetime, timezone
+
+from app.core.config import settings
+from app.database import engine
+from app.services.mood_partitions import RETENTION_ACTIONS, maintain
+
+parser = argparse.ArgumentParser(
+    description="Create upcoming mood_entries partitions and expire old ones (run daily)."
+)
+parser.add_argument("--premake", type=int, default=settings.MOODS_PARTITION_PREMAKE)
+parser.add_argument("--retention-months", type=int, default=settings.MOODS_RETENTION_MONTHS)
+parser.add_argument("--action", choices=RETENTION_ACTIONS, default=settings.MOODS_RETENTION_ACTION)
+parser.add_argument("--archive-schema", default=settings.MOODS_ARCHIVE_SCHEMA)
+parser.add_argument("--dry-run", action="store_true", help="only print what would change")
+args = parser.parse_args()
+
+print("Maintaining mood_entries partitions..." + (" (dry run)" if args.dry_run else ""))
+report = maintain(
+    engine,
+    # Partition bounds are UTC months, so "today" must be the UTC date too.
+    datetime.now(timezone.utc).date(),
+    premake=args.premake,
+    retention_months=args.retention_months,
+    action=args.action,
+    archive_schema=args.archive_schema,
+    dry_run=args.dry_run,
+)
+for name in report["created"]:
+    moved = report["split"].get(name)
+    print(f"  created {name}" + (f" ({moved} rows moved from the default partition)" if moved else ""))
+for name in report["expired"]:
+    print(f"  expired {name} ({report['action']})")
+for name, error in report["failed"].items():
+    print(f"  FAILED {name}: {error}")
+if report["failed"]:
+    raise SystemExit(1)
+print("Done!")
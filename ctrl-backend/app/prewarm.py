@@ -0,0 +1,184 @@
+"""
+Startup prewarming.
+
+Run from the lifespan before the instance takes traffic, so the first
+requests after a deploy don't pay for opening DB connections, compiling
+the hot statements, building the OpenAPI schema or spinning up the
+password hashing pool. GET /ready reports the outcome; /health stays a
+plain liveness check.
+"""
+import asyncio
+import logging
+import time
+
+from fastapi import FastAPI, HTTPException
+from sqlalchemy import select
+
+from app.auth import key_store
+from app.core.config import settings
+from app.database import AsyncSessionLocal, async_engine
+from app.dependencies import _get_user_by_id
+from app.models.user import User
+from app.routers.auth import _get_user_by_email
+from app.routers.moods import _get_firebase_user_id, _list_query, _moods_version
+from app.routers.users import _get_user_by_firebase_uid
+from app.services.principal_cache import UserSnapshot, principal_cache
+from app.services.token_versions import token_versions
+from app.services.security import _get_hash_executor, bcrypt_rounds
+from app.utils.swagger_oauth_fix import cached_openapi
+
+logger = logging.getLogger("ctrl-backend")
+
+# Failed prewarms are retried from GET /ready, at most this often.
+RETRY_INTERVAL = 5.0
+
+
+class Readiness:
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.ready = False
+        self.steps: dict[str, dict] = {}
+        self._running = False
+        self._last_attempt = 0.0
+
+    def snapshot(self) -> dict:
+        return {"status": "ready" if self.ready else "starting", "steps": self.steps}
+
+
+readiness = Readiness()
+
+
+async def _open_pool() -> dict:
+    """Check out pool_size connections at once so all of them get opened."""
+    results = await asyncio.gather(
+        *(async_engine.connect().start() for _ in range(settings.DB_POOL_SIZE)),
+        return_exceptions=True,
+    )
+    connections = [conn for conn in results if not isinstance(conn, BaseException)]
+    try:
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        await asyncio.gather(*(conn.exec_driver_sql("SELECT 1") for conn in connections))
+    finally:
+        await asyncio.gather(*(conn.close() for conn in connections))
+    return {"connections": len(connections)}
+
+
+async def _compile_statements() -> dict:
+    """
+    Run each hot query once with a key that matches nothing.
+
+    Goes through the same helpers the routes use, so the statements land
+    in SQLAlchemy's compiled cache under the keys real requests hit.
+    """
+    async with AsyncSessionLocal() as db:
+        await _get_user_by_id(db, 0)
+        await _get_user_by_email(db, "")
+        await _get_user_by_firebase_uid(db, "")
+        try:
+            await _get_firebase_user_id(db, {"uid": ""})
+        except HTTPException:
+            pass
+        await _moods_version(db, 0)
+        await db.execute(_list_query(0, settings.MOODS_PAGE_DEFAULT))
+    return {"statements": 6}
+
+
+async def _warm_principals() -> dict:
+    if settings.PREWARM_PRINCIPALS <= 0:
+        return {"loaded": 0}
+    # Newest accounts are the likeliest to be active; this walks the PK
+    # index, so it stays cheap however large users grows.
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(User).order_by(User.id.desc()).limit(settings.PREWARM_PRINCIPALS)
+        )
+        users = result.scalars().all()
+    for user in users:
+        principal_cache.put(user.id, UserSnapshot.from_user(user))
+    return {"loaded": len(users)}
+
+
+async def _load_token_versions() -> dict:
+    if not settings.STATELESS_PRINCIPAL:
+        return {"enabled": False}
+    return {"revoked_users": await token_versions.refresh()}
+
+
+async def _warm_hashing() -> dict:
+    # Executors start workers lazily; a trivial job per worker makes them
+    # spawn now (a process pool also imports bcrypt in each child here).
+    executor = _get_hash_executor()
+    await asyncio.gather(
+        *(asyncio.wrap_future(executor.submit(int)) for _ in range(settings.PASSWORD_HASH_WORKERS))
+    )
+    # BCRYPT_CALIBRATE runs from the lifespan, before prewarm, so this is
+    # already the calibrated cost.
+    return {"workers": settings.PASSWORD_HASH_WORKERS, "bcrypt_rounds": bcrypt_rounds()}
+
+
+async def _check_firebase_keys() -> dict:
+    # Not fatal: verify_token falls back to firebase_admin without them.
+    return {"local_keys": key_store.ready}
+
+
+async def _build_openapi(app: FastAPI) -> dict:
+    cached_openapi(app)
+    return {}
+
+
+async def _run_steps(app: FastAPI) -> bool:
+    steps = {
+        "db_pool": _open_pool,
+        "statements": _compile_statements,
+        "principal_cache": _warm_principals,
+        "token_versions": _load_token_versions,
+        "password_hashing": _warm_hashing,
+        "firebase_keys": _check_firebase_keys,
+        "openapi": lambda: _build_openapi(app),
+    }
+
+    ok = True
+    for name, step in steps.items():
+        if readiness.steps.get(name, {}).get("ok"):
+            continue
+        started = time.perf_counter()
+        try:
+            detail = await step()
+            readiness.steps[name] = {"ok": True, **detail}
+        except Exception as e:
+            logger.warning("prewarm step %s failed", name, exc_info=True)
+            readiness.steps[name] = {"ok": False, "error": type(e).__name__}
+            ok = False
+        readiness.steps[name]["ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return ok
+
+
+async def prewarm(app: FastAPI) -> bool:
+    """Run (or re-run the failed) prewarm steps; returns whether the app is ready."""
+    if readiness.ready or readiness._running:
+        return readiness.ready
+    if not settings.PREWARM_ENABLED:
+        readiness.ready = True
+        return True
+
+    readiness._running = True
+    readiness._last_attempt = time.monotonic()
+    try:
+        readiness.ready = await asyncio.wait_for(_run_steps(app), settings.PREWARM_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning("prewarm timed out after %ss", settings.PREWARM_TIMEOUT)
+        readiness.ready = False
+    finally:
+        readiness._running = False
+    return readiness.ready
+
+
+async def check_ready(app: FastAPI) -> bool:
+    """Readiness for GET /ready, retrying a failed prewarm now and then."""
+    if not readiness.ready and time.monotonic() - readiness._last_attempt >= RETRY_INTERVAL:
+        await prewarm(app)
+    return readiness.ready
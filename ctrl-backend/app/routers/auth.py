@@ -1,17 +1,29 @@
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Request, Response, status
+from sqlalchemy import exists, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.dependencies import get_db, get_current_user
+from app.database import AsyncSessionLocal, get_async_db
+from app.dependencies import get_current_user
 from app.models.user import User
 from app.schemas.user import UserCreate, UserRead
 from app.schemas.auth import Token, LoginRequest
+from app.services.idempotency import fingerprint, idempotency_key_header, idempotency_store
+from app.services.principal_cache import UserSnapshot
+from app.services.rate_limit import client_ip, enforce_async, limit_ip
+from app.services.token_versions import revoke_tokens
 from app.services.security import (
-    hash_password,
-    verify_password,
+    PasswordHasherBusy,
+    hash_password_async,
+    verify_password_async,
     create_access_token,
+    principal_claims,
+    needs_rehash,
 )
 from app.core.config import settings  # FIXED IMPORT
+from app.utils.etag import etag_matches, make_etag, not_modified
 
 router = APIRouter(
     prefix="/auth",
@@ -19,40 +31,129 @@ router = APIRouter(
 )
 
 
-@router.post("/signup", response_model=UserRead)
-def signup(payload: UserCreate, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.email == payload.email).first()
-    if existing:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered",
-        )
+def _hashing_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many authentication requests, please retry shortly",
+        headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER)},
+    )
+
+
+def _email_taken() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Email already registered",
+    )
+
+
+async def _get_user_by_email(db: AsyncSession, email: str) -> User | None:
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
+
+
+def _insert_user_ignoring_duplicate(db: AsyncSession, values: dict):
+    """INSERT ... ON CONFLICT (email) DO NOTHING RETURNING id, created_at."""
+    insert = sqlite_insert if db.bind.dialect.name == "sqlite" else pg_insert
+    return (
+        insert(User)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User.id, User.created_at)
+    )
+
+
+async def _create_user(db: AsyncSession, payload: UserCreate) -> UserRead:
+    # Cheap index probe first, so a duplicate signup costs no bcrypt time.
+    if await db.scalar(select(exists().where(User.email == payload.email))):
+        raise _email_taken()
+
+    try:
+        hashed = await hash_password_async(payload.password)
+    except PasswordHasherBusy:
+        raise _hashing_busy()
 
-    user = User(
-        email=payload.email,
-        hashed_password=hash_password(payload.password),
+    # A concurrent signup for the same email can still win between the
+    # probe and here; ON CONFLICT turns that into "no row" rather than an
+    # IntegrityError.
+    result = await db.execute(
+        _insert_user_ignoring_duplicate(db, {"email": payload.email, "hashed_password": hashed})
     )
+    row = result.first()
+    await db.commit()
+    if row is None:
+        raise _email_taken()
 
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+    return UserRead(id=row.id, email=payload.email, created_at=row.created_at)
 
-    return user
 
+@router.post("/signup", response_model=UserRead, dependencies=[Depends(limit_ip("signup_ip"))])
+async def signup(
+    payload: UserCreate,
+    idempotency_key: str | None = Depends(idempotency_key_header),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if idempotency_key is None:
+        return await _create_user(db, payload)
 
-@router.post("/login", response_model=Token)
-def login(payload: LoginRequest, db: Session = Depends(get_db)):
+    async def create() -> dict:
+        return (await _create_user(db, payload)).model_dump(mode="json")
 
-    user = db.query(User).filter(User.email == payload.email).first()
+    # Fingerprint on the email only; a password hash has no business here.
+    return await idempotency_store.run(
+        f"signup:{idempotency_key}", fingerprint(payload.email), create
+    )
+
+
+async def _rehash_password(user_id: int, old_hash: str, password: str) -> None:
+    """Re-hash at the current cost after the login response has gone out."""
+    try:
+        new_hash = await hash_password_async(password)
+    except PasswordHasherBusy:
+        return  # try again on a later login
+
+    async with AsyncSessionLocal() as db:
+        # Only replace the hash we verified; a concurrent password change wins.
+        await db.execute(
+            update(User)
+            .where(User.id == user_id, User.hashed_password == old_hash)
+            .values(hashed_password=new_hash)
+        )
+        await db.commit()
+
+
+@router.post("/login", response_model=Token, dependencies=[Depends(limit_ip("login_ip"))])
+async def login(
+    payload: LoginRequest,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Tighter limit on one account from one IP. Keyed on the IP as well, so
+    # failed attempts from elsewhere can't lock the owner out.
+    await enforce_async("login_account", f"{client_ip(request)}:{payload.email.lower()}")
 
-    if not user or not verify_password(payload.password, user.hashed_password):
+    user = await _get_user_by_email(db, payload.email)
+
+    try:
+        valid = (
+            user is not None
+            and user.hashed_password is not None
+            and await verify_password_async(payload.password, user.hashed_password)
+        )
+    except PasswordHasherBusy:
+        raise _hashing_busy()
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
         )
 
+    if needs_rehash(user.hashed_password):
+        background_tasks.add_task(_rehash_password, user.id, user.hashed_password, payload.password)
+
     access_token = create_access_token(
-        data={"sub": str(user.id)},
+        data=principal_claims(user),
         expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     )
 
@@ -60,5 +161,25 @@ def login(payload: LoginRequest, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=UserRead)
-def read_me(current_user: User = Depends(get_current_user)):
+def read_me(
+    response: Response,
+    if_none_match: str | None = Header(None),
+    current_user: UserSnapshot = Depends(get_current_user),
+):
+    etag = make_etag(current_user.id, current_user.email, current_user.created_at)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
     return current_user
+
+
+@router.post("/revoke", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke(
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Sign out everywhere: every access token issued so far stops working."""
+    await revoke_tokens(db, current_user.id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
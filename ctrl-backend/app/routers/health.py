@@ -1,7 +1,20 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, status
+from fastapi.responses import JSONResponse
+
+from app.prewarm import check_ready, readiness
 
 router = APIRouter()
 
 @router.get("/health")
 def health_check():
     return {"status": "ok"}
+
+
+@router.get("/ready")
+async def readiness_check(request: Request):
+    """503 until startup prewarming has succeeded; use for readiness/startup probes."""
+    ready = await check_ready(request.app)
+    return JSONResponse(
+        readiness.snapshot(),
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
@@ -0,0 +1,110 @@
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from app.auth import token_cache
+from app.core.config import settings
+from app.database import async_pool_metrics, sync_pool_metrics
+from app.services.mood_writer import mood_writer
+from app.services.principal_cache import firebase_user_ids, principal_cache
+from app.utils.logging import logging_stats
+from app.utils.metrics import render_histogram, request_metrics
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def require_internal_token(x_internal_token: str | None = Header(None)):
+    # Closed unless a token is configured: these endpoints share the public
+    # port and expose traffic, pool and logging internals.
+    if not settings.INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_internal_token is None or not secrets.compare_digest(
+        x_internal_token, settings.INTERNAL_API_TOKEN
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Internal endpoint",
+        )
+
+
+router = APIRouter(
+    prefix="/internal",
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_token)],
+)
+
+# Served at the root so scrapers can use the conventional /metrics path.
+metrics_router = APIRouter(
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_token)],
+)
+
+
+@router.get("/db/pool")
+def pool_stats():
+    return {
+        "sync": sync_pool_metrics.snapshot(),
+        "async": async_pool_metrics.snapshot(),
+    }
+
+
+@router.get("/logging")
+def log_queue_stats():
+    return logging_stats()
+
+
+def _render_prometheus() -> str:
+    lines: list[str] = []
+    request_metrics.render(lines)
+
+    pools = {"sync": sync_pool_metrics.snapshot(), "async": async_pool_metrics.snapshot()}
+    for name, kind, key in (
+        ("db_pool_checked_out", "gauge", "checked_out"),
+        ("db_pool_overflow", "gauge", "overflow"),
+    ):
+        lines.append(f"# TYPE {name} {kind}")
+        for engine, snapshot in pools.items():
+            if key in snapshot["pool"]:
+                lines.append(f'{name}{{engine="{engine}"}} {snapshot["pool"][key]}')
+    for key in ("checkouts", "connects", "overflow_connects", "invalidations", "timeouts"):
+        name = f"db_pool_{key}_total"
+        lines.append(f"# TYPE {name} counter")
+        for engine, snapshot in pools.items():
+            lines.append(f'{name}{{engine="{engine}"}} {snapshot[key]}')
+    lines.append("# TYPE db_pool_wait_seconds histogram")
+    for engine, metrics in (("sync", sync_pool_metrics), ("async", async_pool_metrics)):
+        render_histogram(lines, "db_pool_wait_seconds", metrics.wait_time, engine=engine)
+
+    caches = {
+        "token": token_cache.stats(),
+        "principal": principal_cache.stats(),
+        "firebase_uid": firebase_user_ids.stats(),
+    }
+    for name, kind, key in (
+        ("cache_hits_total", "counter", "hits"),
+        ("cache_misses_total", "counter", "misses"),
+        ("cache_entries", "gauge", "size"),
+    ):
+        lines.append(f"# TYPE {name} {kind}")
+        for cache, stats in caches.items():
+            lines.append(f'{name}{{cache="{cache}"}} {stats[key]}')
+
+    writer_stats = mood_writer.stats()
+    lines.append("# TYPE mood_group_commit_batches_total counter")
+    lines.append(f"mood_group_commit_batches_total {writer_stats['batches']}")
+    lines.append("# TYPE mood_group_commit_rows_total counter")
+    lines.append(f"mood_group_commit_rows_total {writer_stats['rows']}")
+
+    log_stats = logging_stats()
+    lines.append("# TYPE log_queue_depth gauge")
+    lines.append(f"log_queue_depth {log_stats['queued']}")
+    lines.append("# TYPE log_records_dropped_total counter")
+    lines.append(f"log_records_dropped_total {log_stats['dropped']}")
+
+    return "\n".join(lines) + "\n"
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(_render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
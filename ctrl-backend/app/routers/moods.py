@@ -1,50 +1,401 @@
-from fastapi import APIRouter, Depends
+import base64
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime, time, timedelta, timezone
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import func, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from app.auth import verify_token
-from app.database import SessionLocal
+from app.core.config import settings
+from app.database import AsyncSessionLocal, get_async_db
 from app.models.mood import MoodEntry
 from app.models.user import User
+from app.schemas.mood import (
+    MoodBatchItemResult,
+    MoodBatchRequest,
+    MoodBatchResponse,
+    MoodCreate,
+    MoodCreated,
+    MoodRead,
+)
+from app.services.idempotency import fingerprint, idempotency_key_header, idempotency_store
+from app.services.mood_writer import mood_writer
+from app.services.principal_cache import firebase_user_ids
+from app.services.rate_limit import limit_firebase_user
+from app.utils.etag import etag_matches, make_etag, not_modified
+from app.utils.logging import bind_log_context, log_api_call
+from app.utils.responses import ORJSONResponse
 
 router = APIRouter()
 
-@router.post("/moods")
-def create_mood(data: dict, decoded=Depends(verify_token)):
-    db = SessionLocal()
 
-    user = db.query(User).filter(User.firebase_uid == decoded["uid"]).first()
+async def _get_firebase_user_id(db: AsyncSession, decoded: dict) -> int:
+    user_id = firebase_user_ids.get(decoded["uid"])
+    if user_id is None:
+        result = await db.execute(select(User.id).where(User.firebase_uid == decoded["uid"]))
+        user_id = result.scalar()
+        if user_id is None:
+            # Not cached: GET /users/me may create the user any moment.
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found",
+            )
+        firebase_user_ids.put(decoded["uid"], user_id)
+    bind_log_context(user_id=user_id)
+    return user_id
+
+
+def _range_bounds(
+    from_: date | None, to: date | None
+) -> tuple[datetime | None, datetime | None, bool]:
+    """
+    Turn the inclusive from/to filters into created_at bounds.
+
+    A bare date in `to` covers that whole day, so it becomes an exclusive
+    bound at the next midnight. Returns (lower, upper, upper_inclusive).
+    """
+    lower = upper = None
+    upper_inclusive = True
+    if from_ is not None:
+        lower = from_ if isinstance(from_, datetime) else datetime.combine(from_, time.min)
+    if to is not None:
+        if isinstance(to, datetime):
+            upper = to
+        else:
+            upper = datetime.combine(to + timedelta(days=1), time.min)
+            upper_inclusive = False
+    return lower, upper, upper_inclusive
+
+
+def _encode_cursor(created_at: datetime, entry_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), entry_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, entry_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(entry_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
 
-    entry = MoodEntry(
-        user_id=user.id,
-        mood_score=data["mood_score"],
-        energy_level=data["energy_level"],
-        stress_level=data["stress_level"]
+
+EXPORT_COLUMNS = ("id", "mood_score", "energy_level", "stress_level", "mood", "note", "created_at")
+
+
+def _export_ndjson(rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, _export_values(row))), separators=(",", ":")) + "\n"
+        for row in rows
     )
 
-    db.add(entry)
-    db.commit()
-    db.refresh(entry)
 
-    return {"id": str(entry.id)}
+def _export_csv(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(_export_values(row) for row in rows)
+    return buffer.getvalue()
+
+
+def _export_values(row) -> tuple:
+    *values, created_at = row
+    return (*values, created_at.isoformat() if created_at else None)
+
+
+async def _stream_export(user_id: int, fmt: str, compress: bool):
+    """
+    Yield the user's full mood history in `fmt`, oldest first.
+
+    Rows come from a server-side cursor in MOODS_EXPORT_BATCH_SIZE
+    partitions, so memory stays flat however long the history is. The
+    generator owns its session because it outlives the request's
+    dependencies.
+    """
+    encode = _export_csv if fmt == "csv" else _export_ndjson
+    compressor = zlib.compressobj(wbits=31) if compress else None  # gzip framing
+
+    def emit(text: str) -> bytes:
+        data = text.encode("utf-8")
+        return compressor.compress(data) if compressor else data
+
+    query = (
+        select(*(getattr(MoodEntry, column) for column in EXPORT_COLUMNS))
+        .where(MoodEntry.user_id == user_id)
+        .order_by(MoodEntry.created_at, MoodEntry.id)
+        .execution_options(yield_per=settings.MOODS_EXPORT_BATCH_SIZE)
+    )
+
+    if fmt == "csv":
+        yield emit(",".join(EXPORT_COLUMNS) + "\r\n")
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query)
+        async for rows in result.partitions():
+            chunk = emit(encode(rows))
+            if chunk:
+                yield chunk
+
+    if compressor:
+        yield compressor.flush()
+
+
+async def _insert_mood(db: AsyncSession, user_id: int, data: MoodCreate) -> int:
+    if settings.MOODS_GROUP_COMMIT:
+        entry_id = await mood_writer.submit({
+            "user_id": user_id,
+            "mood_score": data.mood_score,
+            "energy_level": data.energy_level,
+            "stress_level": data.stress_level,
+            # Rows share one executemany, so every one needs created_at.
+            "created_at": data.created_at or datetime.now(timezone.utc),
+        })
+    else:
+        entry = MoodEntry(
+            user_id=user_id,
+            mood_score=data.mood_score,
+            energy_level=data.energy_level,
+            stress_level=data.stress_level,
+        )
+        if data.created_at is not None:
+            entry.created_at = data.created_at
+
+        db.add(entry)
+        await db.commit()
+        # The id is set by the INSERT; no refresh round trip needed.
+        entry_id = entry.id
+
+    log_api_call(user_id=str(user_id), extra={"action": "create"})
+    return entry_id
+
+
+@router.post(
+    "/moods",
+    response_model=MoodCreated,
+    dependencies=[Depends(limit_firebase_user("moods_write_user"))],
+)
+async def create_mood(
+    data: MoodCreate,
+    idempotency_key: str | None = Depends(idempotency_key_header),
+    decoded=Depends(verify_token),
+    db: AsyncSession = Depends(get_async_db),
+):
+    user_id = await _get_firebase_user_id(db, decoded)
+
+    if idempotency_key is None:
+        return MoodCreated(id=str(await _insert_mood(db, user_id, data)))
+
+    async def create() -> dict:
+        return {"id": str(await _insert_mood(db, user_id, data))}
+
+    return await idempotency_store.run(
+        f"moods:{decoded['uid']}:{idempotency_key}",
+        fingerprint(data.model_dump(mode="json")),
+        create,
+    )
 
-@router.get("/moods")
-def list_moods(decoded=Depends(verify_token)):
-    db = SessionLocal()
-    user = db.query(User).filter(User.firebase_uid == decoded["uid"]).first()
 
-    entries = db.query(MoodEntry).filter(MoodEntry.user_id == user.id).all()
+@router.post(
+    "/moods/batch",
+    response_model=MoodBatchResponse,
+    dependencies=[Depends(limit_firebase_user("moods_write_user"))],
+)
+async def create_moods_batch(
+    payload: MoodBatchRequest,
+    decoded=Depends(verify_token),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Store many mood check-ins at once (e.g. an offline queue being replayed).
 
-    return [
-        {
-            "id": str(e.id),
-            "mood": e.mood_score,
-            "energy": e.energy_level,
-            "stress": e.stress_level
-        }
-        for e in entries
-    ]
-from app.utils.logging import log_api_call
+    Every entry is validated on its own; valid ones are written with a
+    single multi-row INSERT in one transaction and invalid ones are
+    reported by index without affecting the rest.
+    """
+    user_id = await _get_firebase_user_id(db, decoded)
 
-@router.post("/moods")
-def create_mood(data: dict, decoded=Depends(verify_token)):
-    ...
-    log_api_call("/moods", user_id=str(user.id), extra={"action": "create"})
-    ...
+    results: list[MoodBatchItemResult] = []
+    rows: list[dict] = []
+    row_indexes: list[int] = []
+    received_at = datetime.now(timezone.utc)
+
+    for index, raw in enumerate(payload.entries):
+        try:
+            item = MoodCreate.model_validate(raw)
+        except ValidationError as e:
+            first = e.errors()[0]
+            field = ".".join(str(part) for part in first["loc"])
+            results.append(MoodBatchItemResult(index=index, error=f"{field}: {first['msg']}"))
+            continue
+
+        rows.append({
+            "user_id": user_id,
+            "mood_score": item.mood_score,
+            "energy_level": item.energy_level,
+            "stress_level": item.stress_level,
+            # Every row needs the same keys for executemany, so fill the
+            # receipt time here instead of relying on the server default.
+            "created_at": item.created_at or received_at,
+        })
+        row_indexes.append(index)
+
+    if rows:
+        result = await db.execute(
+            insert(MoodEntry).returning(MoodEntry.id, sort_by_parameter_order=True),
+            rows,
+        )
+        ids = result.scalars().all()
+        await db.commit()
+        results.extend(
+            MoodBatchItemResult(index=index, id=str(entry_id))
+            for index, entry_id in zip(row_indexes, ids)
+        )
+
+    results.sort(key=lambda r: r.index)
+
+    log_api_call(
+        user_id=str(user_id),
+        extra={"action": "create_batch", "created": len(rows)},
+    )
+
+    return MoodBatchResponse(
+        created=len(rows),
+        failed=len(results) - len(rows),
+        results=results,
+    )
+
+
+@router.get("/moods/export")
+async def export_moods(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = Query(False, description="Compress the stream on the fly"),
+    decoded=Depends(verify_token),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Stream the caller's complete mood history as NDJSON or CSV."""
+    user_id = await _get_firebase_user_id(db, decoded)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="moods.{format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+
+    log_api_call(user_id=str(user_id), extra={"format": format})
+
+    return StreamingResponse(
+        _stream_export(user_id, format, gzip),
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+async def _moods_version(db: AsyncSession, user_id: int) -> tuple[int, int | None]:
+    """
+    (row count, max id) for the user's entries.
+
+    Entries are only ever inserted or deleted, never edited, so this pair
+    changes whenever any page of the listing could.
+    """
+    result = await db.execute(
+        select(func.count(), func.max(MoodEntry.id)).where(MoodEntry.user_id == user_id)
+    )
+    return tuple(result.one())
+
+
+def _list_query(user_id: int, limit: int):
+    """Newest-first page of a user's entries, one extra row to detect a next page."""
+    return (
+        select(
+            MoodEntry.id,
+            MoodEntry.mood_score,
+            MoodEntry.energy_level,
+            MoodEntry.stress_level,
+            MoodEntry.created_at,
+        )
+        .where(MoodEntry.user_id == user_id)
+        .order_by(MoodEntry.created_at.desc(), MoodEntry.id.desc())
+        .limit(limit + 1)
+    )
+
+
+@router.get("/moods", response_class=ORJSONResponse, responses={200: {"model": list[MoodRead]}})
+async def list_moods(
+    request: Request,
+    limit: int = Query(settings.MOODS_PAGE_DEFAULT, ge=1, le=settings.MOODS_PAGE_MAX),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    before: datetime | None = Query(None, description="Only entries created before this time"),
+    after: datetime | None = Query(None, description="Only entries created at or after this time"),
+    from_: date | datetime | None = Query(None, alias="from", description="Inclusive start date/time"),
+    to: date | datetime | None = Query(None, description="Inclusive end date/time"),
+    if_none_match: str | None = Header(None),
+    decoded=Depends(verify_token),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    List the caller's mood entries, newest first.
+
+    Pages are keyed on (created_at, id); when more entries remain, the
+    X-Next-Cursor response header carries the cursor for the next page.
+    Without `limit` a page holds MOODS_PAGE_DEFAULT entries, so clients
+    wanting the full history must follow the cursor (or use /moods/export).
+    Every filter is a range on created_at, so the whole query is served
+    by the (user_id, created_at DESC) index.
+
+    The ETag covers the user's data version plus the query string, so a
+    matching If-None-Match is answered with 304 before any row is read.
+    """
+    user_id = await _get_firebase_user_id(db, decoded)
+
+    count, max_id = await _moods_version(db, user_id)
+    etag = make_etag(user_id, count, max_id, request.url.query)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    query = _list_query(user_id, limit)
+    if before is not None:
+        query = query.where(MoodEntry.created_at < before)
+    if after is not None:
+        query = query.where(MoodEntry.created_at >= after)
+
+    lower, upper, upper_inclusive = _range_bounds(from_, to)
+    if lower is not None:
+        query = query.where(MoodEntry.created_at >= lower)
+    if upper is not None:
+        query = query.where(
+            MoodEntry.created_at <= upper if upper_inclusive else MoodEntry.created_at < upper
+        )
+    if cursor is not None:
+        query = query.where(
+            tuple_(MoodEntry.created_at, MoodEntry.id) < tuple_(*_decode_cursor(cursor))
+        )
+
+    rows = (await db.execute(query)).all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        headers["X-Next-Cursor"] = _encode_cursor(last.created_at, last.id)
+
+    # Rows go straight to orjson; re-validating each one against MoodRead
+    # costs more than the query on a full page.
+    return ORJSONResponse(
+        [
+            {
+                "id": str(entry_id),
+                "mood": mood_score,
+                "energy": energy_level,
+                "stress": stress_level
+            }
+            for entry_id, mood_score, energy_level, stress_level, _ in rows
+        ],
+        headers=headers,
+    )
@@ -1,22 +1,36 @@
 from fastapi import APIRouter, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from app.auth import verify_token
-from app.database import SessionLocal
+from app.database import get_async_db
 from app.models.user import User
+from app.services.principal_cache import firebase_user_ids
 
 router = APIRouter()
 
+
+async def _get_user_by_firebase_uid(db: AsyncSession, firebase_uid: str) -> User | None:
+    result = await db.execute(select(User).where(User.firebase_uid == firebase_uid))
+    return result.scalars().first()
+
+
 @router.get("/me")
-def get_me(decoded=Depends(verify_token)):
+async def get_me(
+    decoded=Depends(verify_token),
+    db: AsyncSession = Depends(get_async_db),
+):
     firebase_uid = decoded["uid"]
-    db = SessionLocal()
-
-    user = db.query(User).filter(User.firebase_uid == firebase_uid).first()
 
-    if not user:
-        new_user = User(firebase_uid=firebase_uid)
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
-        return {"id": str(new_user.id), "firebase_uid": firebase_uid}
+    user_id = firebase_user_ids.get(firebase_uid)
+    if user_id is None:
+        user = await _get_user_by_firebase_uid(db, firebase_uid)
+        if not user:
+            user = User(firebase_uid=firebase_uid)
+            db.add(user)
+            await db.commit()
+            await db.refresh(user)
+        user_id = user.id
+        firebase_user_ids.put(firebase_uid, user_id)
 
-    return {"id": str(user.id), "firebase_uid": firebase_uid}
+    return {"id": str(user_id), "firebase_uid": firebase_uid}
@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel, EmailStr
 
 class Token(BaseModel):
@@ -6,6 +7,10 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     user_id: int | None = None
+    # Principal claims; absent from tokens issued before they were added.
+    email: str | None = None
+    created_at: datetime | None = None
+    token_version: int | None = None
 
 class LoginRequest(BaseModel):
     email: EmailStr
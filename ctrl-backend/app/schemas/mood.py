@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+from pydantic import BaseModel, Field, field_validator
+
+from app.core.config import settings
+from app.services.mood_partitions import oldest_retained_month
+
+class MoodCreate(BaseModel):
+    mood_score: int
+    energy_level: int
+    stress_level: int
+    # When the check-in happened on the device; defaults to receipt time.
+    created_at: datetime | None = None
+
+    @field_validator("created_at")
+    @classmethod
+    def within_retention(cls, value: datetime | None) -> datetime | None:
+        # Rows older than MOODS_RETENTION_MONTHS would land in an expired
+        # month and only be archived (or dropped) on the next maintenance run.
+        if value is None:
+            return value
+        now = datetime.now(timezone.utc)
+        oldest = oldest_retained_month(now.date(), settings.MOODS_RETENTION_MONTHS)
+        aware = value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+        if oldest is not None and aware < datetime(oldest.year, oldest.month, 1, tzinfo=timezone.utc):
+            raise ValueError(f"created_at is older than the retention window ({oldest:%Y-%m} onwards)")
+        return value
+
+class MoodCreated(BaseModel):
+    id: str
+
+class MoodRead(BaseModel):
+    # Documents GET /moods; rows are serialized without going through it.
+    id: str
+    mood: int | None
+    energy: int | None
+    stress: int | None
+
+class MoodBatchRequest(BaseModel):
+    # Items are validated one by one so a bad entry doesn't reject the batch.
+    entries: list[dict] = Field(min_length=1, max_length=settings.MOODS_BATCH_MAX)
+
+class MoodBatchItemResult(BaseModel):
+    index: int
+    id: str | None = None
+    error: str | None = None
+
+class MoodBatchResponse(BaseModel):
+    created: int
+    failed: int
+    results: list[MoodBatchItemResult]
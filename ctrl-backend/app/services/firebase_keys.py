@@ -0,0 +1,212 @@
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+from jose import jwt
+
+logger = logging.getLogger("ctrl-backend")
+
+GOOGLE_CERTS_URL = (
+    "https://www.googleapis.com/robot/v1/metadata/x509/"
+    "securetoken@system.gserviceaccount.com"
+)
+ISSUER_PREFIX = "https://securetoken.google.com/"
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class FirebaseKeyStore:
+    """
+    Local copy of the Firebase ID token signing keys.
+
+    Keys are loaded once at startup (from the on-disk copy when one exists,
+    so cold starts need no network), refreshed by a background thread
+    before their max-age runs out, and used to verify RS256 ID tokens
+    without leaving the process.
+
+    `source` is either Google's x509 cert endpoint or a path / file:// URL
+    to a stand-in document. Both the {kid: PEM} x509 map and a JWKS
+    ({"keys": [...]}) are accepted.
+    """
+
+    def __init__(
+        self,
+        project_id: str | None,
+        source: str = GOOGLE_CERTS_URL,
+        cache_path: str | Path | None = None,
+        refresh_margin: int = 300,
+        retry_interval: int = 60,
+        default_max_age: int = 3600,
+    ):
+        self.project_id = project_id
+        self.source = source
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self.default_max_age = default_max_age
+
+        self._keys: dict[str, str | dict] = {}
+        self._expires_at = 0.0
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def ready(self) -> bool:
+        return bool(self._keys) and bool(self.project_id)
+
+    @property
+    def expires_at(self) -> float:
+        return self._expires_at
+
+    # -----------------------------
+    # LOADING
+    # -----------------------------
+    def load(self) -> None:
+        """Load keys from the local copy, falling back to the source."""
+        if self._load_cache_file() and self._expires_at > time.time():
+            return
+        try:
+            self.refresh()
+        except Exception:
+            # A stale local copy is still better than no keys at all.
+            if not self._keys:
+                raise
+            logger.warning("firebase key refresh failed, using stale keys", exc_info=True)
+
+    def refresh(self) -> None:
+        document, max_age = self._fetch()
+        expires_at = time.time() + max_age
+        self._install(document, expires_at)
+        self._persist(document, expires_at)
+
+    def _fetch(self) -> tuple[dict, int]:
+        if "://" not in self.source or self.source.startswith("file://"):
+            path = self.source.removeprefix("file://")
+            return json.loads(Path(path).read_text()), self.default_max_age
+
+        with urllib.request.urlopen(self.source, timeout=10) as response:
+            document = json.loads(response.read())
+            cache_control = response.headers.get("Cache-Control", "")
+
+        match = _MAX_AGE_RE.search(cache_control)
+        max_age = int(match.group(1)) if match else self.default_max_age
+        return document, max_age
+
+    def _install(self, document: dict, expires_at: float) -> None:
+        if "keys" in document:
+            keys = {jwk["kid"]: jwk for jwk in document["keys"] if "kid" in jwk}
+        else:
+            keys = dict(document)
+        if not keys:
+            raise ValueError("Signing key document contains no keys")
+
+        with self._lock:
+            self._keys = keys
+            self._expires_at = expires_at
+            self._refreshed_at = time.time()
+
+    def _load_cache_file(self) -> bool:
+        if self.cache_path is None or not self.cache_path.exists():
+            return False
+        try:
+            cached = json.loads(self.cache_path.read_text())
+            self._install(cached["keys"], float(cached["expires_at"]))
+        except Exception:
+            logger.warning("ignoring unreadable firebase key cache", exc_info=True)
+            return False
+        return True
+
+    def _persist(self, document: dict, expires_at: float) -> None:
+        if self.cache_path is None:
+            return
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.cache_path.parent)
+            with os.fdopen(fd, "w") as fh:
+                json.dump({"expires_at": expires_at, "keys": document}, fh)
+            os.replace(tmp, self.cache_path)
+        except OSError:
+            logger.warning("could not persist firebase keys", exc_info=True)
+
+    # -----------------------------
+    # BACKGROUND REFRESH
+    # -----------------------------
+    def start(self) -> None:
+        try:
+            self.load()
+        finally:
+            # Keep retrying in the background even if the first load failed.
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="firebase-keys", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        delay = self._next_refresh_delay()
+        while not self._stop.is_set():
+            self._wake.wait(timeout=delay)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.refresh()
+                delay = self._next_refresh_delay()
+            except Exception:
+                logger.warning("firebase key refresh failed", exc_info=True)
+                delay = self.retry_interval
+
+    def _next_refresh_delay(self) -> float:
+        remaining = self._expires_at - time.time() - self.refresh_margin
+        return max(remaining, self.retry_interval)
+
+    # -----------------------------
+    # VERIFICATION
+    # -----------------------------
+    def verify_id_token(self, token: str) -> dict:
+        """Verify a Firebase ID token against the cached keys."""
+        header = jwt.get_unverified_header(token)
+        if header.get("alg") != "RS256":
+            raise ValueError("ID token must be signed with RS256")
+
+        key = self._keys.get(header.get("kid"))
+        if key is None:
+            # Keys may have rotated since our last fetch; ask for an early
+            # refresh, but no more often than retry_interval.
+            if time.time() - self._refreshed_at >= self.retry_interval:
+                self._wake.set()
+            raise ValueError("ID token signed with an unknown key")
+
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=["RS256"],
+            audience=self.project_id,
+            issuer=ISSUER_PREFIX + self.project_id,
+        )
+
+        subject = claims.get("sub")
+        if not isinstance(subject, str) or not subject or len(subject) > 128:
+            raise ValueError("ID token has an invalid subject")
+        if claims.get("auth_time", 0) > time.time():
+            raise ValueError("ID token auth_time is in the future")
+
+        claims["uid"] = subject
+        return claims
@@ -0,0 +1,246 @@
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+from fastapi import Header, HTTPException, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.database import AsyncSessionLocal
+from app.models.idempotency import IdempotencyKey
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger("ctrl-backend")
+
+# How often a duplicate polls the shared table while the first request runs.
+_POLL_INTERVAL = 0.05
+
+
+def fingerprint(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Replays responses for repeated Idempotency-Key requests.
+
+    Completed responses live in an LRU with a TTL. Requests for a key that
+    is still running wait for the first one instead of racing it: on
+    futures within this process, and, when IDEMPOTENCY_DB is on, through
+    a claim row in idempotency_keys that other workers poll. Only
+    successful responses are stored; if the first request fails, the key
+    is released and the next attempt runs the handler again.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.ttl = ttl
+        self._responses = TTLCache(max_size=max_size, ttl=ttl)
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def clear(self) -> None:
+        self._responses.clear()
+        self._inflight.clear()
+
+    async def run(
+        self,
+        key: str,
+        request_fingerprint: str,
+        handler: Callable[[], Awaitable[dict]],
+        status_code: int = status.HTTP_200_OK,
+    ) -> JSONResponse:
+        """Return the stored response for `key`, or run `handler` once and store its result."""
+        while True:
+            stored = self._responses.get(key)
+            if stored is not None:
+                return _replay(stored, request_fingerprint)
+
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            try:
+                await asyncio.shield(pending)
+            except Exception:
+                pass  # the first attempt failed; try again ourselves
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            if settings.IDEMPOTENCY_DB:
+                stored = await self._claim(key, request_fingerprint)
+                if stored is not None:
+                    self._responses.put(key, stored)
+                    future.set_result(None)
+                    return _replay(stored, request_fingerprint)
+
+            try:
+                if settings.IDEMPOTENCY_DB:
+                    body = await self._run_holding_claim(key, handler)
+                else:
+                    body = await handler()
+            except BaseException:
+                if settings.IDEMPOTENCY_DB:
+                    await self._release(key)
+                raise
+
+            stored = (request_fingerprint, status_code, body)
+            self._responses.put(key, stored)
+            if settings.IDEMPOTENCY_DB:
+                await self._complete(key, status_code, body)
+            future.set_result(None)
+            return JSONResponse(body, status_code=status_code)
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                # Nobody may be waiting; don't warn about an unretrieved exception.
+                future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    # -----------------------------
+    # SHARED TABLE
+    # -----------------------------
+    async def _claim(self, key: str, request_fingerprint: str) -> tuple | None:
+        """
+        Insert a pending row for `key`. Returns None once we own the key, or
+        the stored (fingerprint, status, body) when another request
+        completed it, waiting while that request is still running.
+
+        Pending rows only hold a short lease (IDEMPOTENCY_CLAIM_LEASE) that
+        the owner keeps renewing while its handler runs; if the worker dies,
+        a retry takes the key over once the lease lapses.
+        """
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+        now = datetime.now(timezone.utc)
+        async with AsyncSessionLocal() as db:
+            if random.random() < 0.01:
+                await db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < now))
+                await db.commit()
+
+            while True:
+                try:
+                    await db.execute(insert(IdempotencyKey).values(
+                        key=key,
+                        fingerprint=request_fingerprint,
+                        expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_CLAIM_LEASE),
+                    ))
+                    await db.commit()
+                    return None
+                except IntegrityError:
+                    await db.rollback()
+
+                row = (await db.execute(
+                    select(IdempotencyKey).where(IdempotencyKey.key == key)
+                )).scalars().first()
+                if row is None:
+                    continue  # released between our insert and select
+                if _as_utc(row.expires_at) <= now:
+                    # An expired key, or a pending claim whose worker never
+                    # finished: take it over, unless someone else just did.
+                    await db.execute(
+                        delete(IdempotencyKey)
+                        .where(IdempotencyKey.key == key, IdempotencyKey.expires_at <= now)
+                        .execution_options(synchronize_session=False)
+                    )
+                    await db.commit()
+                    continue
+                if row.status_code is not None:
+                    return row.fingerprint, row.status_code, json.loads(row.body)
+
+                if time.monotonic() >= deadline:
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail="A request with this Idempotency-Key is still in progress",
+                    )
+                db.expunge_all()
+                await asyncio.sleep(_POLL_INTERVAL)
+                now = datetime.now(timezone.utc)
+
+    async def _run_holding_claim(self, key: str, handler: Callable[[], Awaitable[dict]]) -> dict:
+        """Run `handler`, renewing our claim on `key` until it returns."""
+        renewal = asyncio.create_task(self._renew_claim(key))
+        try:
+            return await handler()
+        finally:
+            renewal.cancel()
+            try:
+                await renewal
+            except asyncio.CancelledError:
+                pass
+
+    async def _renew_claim(self, key: str) -> None:
+        # A third of the lease leaves room for a couple of slow or failed renewals.
+        lease = settings.IDEMPOTENCY_CLAIM_LEASE
+        while True:
+            await asyncio.sleep(lease / 3)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(IdempotencyKey)
+                        .where(IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None))
+                        .values(expires_at=datetime.now(timezone.utc) + timedelta(seconds=lease))
+                    )
+                    await db.commit()
+            except Exception:
+                logger.warning("renewing idempotency claim failed", exc_info=True)
+
+    async def _complete(self, key: str, status_code: int, body: dict) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.key == key)
+                .values(
+                    status_code=status_code,
+                    body=json.dumps(body),
+                    expires_at=datetime.now(timezone.utc) + timedelta(seconds=self.ttl),
+                )
+            )
+            await db.commit()
+
+    async def _release(self, key: str) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(IdempotencyKey).where(
+                    IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None)
+                )
+            )
+            await db.commit()
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands timezone-aware columns back naive.
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _replay(stored: tuple, request_fingerprint: str) -> JSONResponse:
+    stored_fingerprint, status_code, body = stored
+    if stored_fingerprint != request_fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail="Idempotency-Key was already used for a different request",
+        )
+    return JSONResponse(body, status_code=status_code, headers={"Idempotent-Replayed": "true"})
+
+
+def idempotency_key_header(
+    idempotency_key: str | None = Header(None, description="Client-generated key; retries with the same key are replayed"),
+) -> str | None:
+    if idempotency_key is not None and not 1 <= len(idempotency_key) <= 255:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Idempotency-Key must be 1-255 characters",
+        )
+    return idempotency_key
+
+
+idempotency_store = IdempotencyStore(
+    max_size=settings.IDEMPOTENCY_CACHE_SIZE,
+    ttl=settings.IDEMPOTENCY_TTL,
+)
@@ -0,0 +1,220 @@
+"""
+Monthly range partitions of mood_entries (PostgreSQL only).
+
+The table is partitioned on created_at by migration e8b2c5f0a417; every
+month lives in mood_entries_pYYYYMM (UTC month bounds) and rows outside
+all of them land in mood_entries_default. maintain() keeps that layout
+healthy and is meant to run daily from app/partition_moods.py:
+
+* rows sitting in the default partition (device clocks far off, or a
+  month nobody pre-created) are moved into their own month partition,
+* the next MOODS_PARTITION_PREMAKE months are created ahead of time,
+* months that fall entirely outside MOODS_RETENTION_MONTHS are detached
+  and then moved to MOODS_ARCHIVE_SCHEMA or dropped.
+
+Each step runs in its own short transaction so a failure leaves the
+table consistent and the next run picks up where this one stopped.
+"""
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+logger = logging.getLogger("ctrl-backend")
+
+TABLE = "mood_entries"
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+_PARTITION_NAME = re.compile(rf"^{TABLE}_p(\d{{4}})(\d{{2}})$")
+
+RETENTION_ACTIONS = ("archive", "drop")
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def partition_month(name: str) -> date | None:
+    match = _PARTITION_NAME.match(name)
+    if match is None:
+        return None
+    return date(int(match[1]), int(match[2]), 1)
+
+
+def _bound(month: date) -> str:
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc).isoformat()
+
+
+def oldest_retained_month(today: date, retention_months: int) -> date | None:
+    """First month still inside the retention window (None keeps everything)."""
+    if retention_months <= 0:
+        return None
+    return add_months(month_start(today), 1 - retention_months)
+
+
+@dataclass
+class PartitionPlan:
+    create: list[date] = field(default_factory=list)
+    expire: list[date] = field(default_factory=list)
+
+
+def plan_partitions(
+    existing: set[date],
+    today: date,
+    premake: int,
+    retention_months: int,
+) -> PartitionPlan:
+    """
+    Months to create and to expire, given the month partitions that exist.
+
+    The current month and the next `premake` are always wanted. With
+    retention_months > 0, a month expires once it is older than the last
+    `retention_months` months (the current one included); 0 keeps all.
+    """
+    current = month_start(today)
+    wanted = [add_months(current, offset) for offset in range(premake + 1)]
+    plan = PartitionPlan(create=[month for month in wanted if month not in existing])
+    oldest_kept = oldest_retained_month(today, retention_months)
+    if oldest_kept is not None:
+        plan.expire = sorted(month for month in existing if month < oldest_kept)
+    return plan
+
+
+def existing_partitions(conn: Connection) -> set[date]:
+    rows = conn.execute(text(
+        "SELECT child.relname FROM pg_inherits"
+        " JOIN pg_class parent ON parent.oid = pg_inherits.inhparent"
+        " JOIN pg_class child ON child.oid = pg_inherits.inhrelid"
+        " WHERE parent.relname = :table AND parent.relkind = 'p'"
+    ), {"table": TABLE})
+    return {month for (name,) in rows if (month := partition_month(name)) is not None}
+
+
+def months_in_default(conn: Connection) -> list[date]:
+    rows = conn.execute(text(
+        f"SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC')::date"
+        f" FROM {DEFAULT_PARTITION} ORDER BY 1"
+    ))
+    return [month for (month,) in rows]
+
+
+def create_partition(conn: Connection, month: date) -> int:
+    """
+    Create and attach the partition for `month`; returns rows moved into it.
+
+    Matching rows are first moved out of the default partition, which
+    ATTACH would otherwise reject. The new table inherits the parent's
+    indexes on attach.
+    """
+    name = partition_name(month)
+    lower, upper = _bound(month), _bound(add_months(month, 1))
+    conn.execute(text(
+        f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    ))
+    moved = conn.execute(text(
+        f"WITH moved AS ("
+        f"  DELETE FROM {DEFAULT_PARTITION}"
+        f"  WHERE created_at >= CAST(:lower AS timestamptz) AND created_at < CAST(:upper AS timestamptz)"
+        f"  RETURNING *"
+        f") INSERT INTO {name} SELECT * FROM moved"
+    ), {"lower": lower, "upper": upper}).rowcount
+    conn.execute(text(
+        f"ALTER TABLE {TABLE} ATTACH PARTITION {name}"
+        f" FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    ))
+    return moved
+
+
+def expire_partition(conn: Connection, month: date, action: str, archive_schema: str) -> None:
+    """
+    Detach the partition for `month`, then archive or drop it.
+
+    A month can be archived twice: rows back-dated into it after the
+    first time land in the default partition and get split out again.
+    Those rows are appended to the archived table.
+    """
+    name = partition_name(month)
+    conn.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name}"))
+    if action == "drop":
+        conn.execute(text(f"DROP TABLE {name}"))
+        return
+
+    conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{archive_schema}"'))
+    archived = conn.execute(
+        text("SELECT to_regclass(:name)"), {"name": f'"{archive_schema}".{name}'}
+    ).scalar()
+    if archived is None:
+        conn.execute(text(f'ALTER TABLE {name} SET SCHEMA "{archive_schema}"'))
+    else:
+        conn.execute(text(f'INSERT INTO "{archive_schema}".{name} SELECT * FROM {name}'))
+        conn.execute(text(f"DROP TABLE {name}"))
+
+
+def maintain(
+    engine: Engine,
+    today: date,
+    premake: int,
+    retention_months: int,
+    action: str = "archive",
+    archive_schema: str = "archive",
+    dry_run: bool = False,
+) -> dict:
+    """Run one maintenance pass; returns what was (or, dry_run, would be) done."""
+    if engine.dialect.name != "postgresql":
+        raise RuntimeError("mood_entries partitioning requires PostgreSQL")
+    if action not in RETENTION_ACTIONS:
+        raise ValueError(f"retention action must be one of {RETENTION_ACTIONS}, not {action!r}")
+
+    with engine.connect() as conn:
+        existing = existing_partitions(conn)
+        if not existing:
+            raise RuntimeError(f"{TABLE} is not partitioned; run the migrations first")
+        stray = [month for month in months_in_default(conn) if month not in existing]
+
+    plan = plan_partitions(existing | set(stray), today, premake, retention_months)
+    report = {"split": {}, "created": [], "expired": [], "failed": {}, "action": action}
+    # Stray months are created (and retention applied to them) like any other.
+    for month in sorted(set(stray) | set(plan.create)):
+        name = partition_name(month)
+        if dry_run:
+            report["created"].append(name)
+            continue
+        try:
+            with engine.begin() as conn:
+                moved = create_partition(conn, month)
+        except SQLAlchemyError as e:
+            # One bad month must not stall every later step, run after run.
+            logger.warning("creating partition %s failed", name, exc_info=True)
+            report["failed"][name] = str(e)
+            continue
+        report["created"].append(name)
+        if moved:
+            report["split"][name] = moved
+
+    for month in plan.expire:
+        name = partition_name(month)
+        if name in report["failed"]:
+            continue
+        if not dry_run:
+            try:
+                with engine.begin() as conn:
+                    expire_partition(conn, month, action, archive_schema)
+            except SQLAlchemyError as e:
+                logger.warning("expiring partition %s failed", name, exc_info=True)
+                report["failed"][name] = str(e)
+                continue
+        report["expired"].append(name)
+    return report
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.database import AsyncSessionLocal
+from app.models.mood import MoodEntry
+
+logger = logging.getLogger("ctrl-backend")
+
+
+class BatchRejected(Exception):
+    """The INSERT failed before COMMIT, so none of the batch was written."""
+
+
+class MoodWriter:
+    """
+    Group commit for single mood inserts.
+
+    Requests hand their row to submit() and wait. A background task
+    collects rows for up to `window` seconds or `max_rows` rows, writes
+    them with one multi-row INSERT ... RETURNING in one transaction, and
+    only after COMMIT returns resolves each waiter with its id, so an
+    acknowledged entry is always durable. If the INSERT is rejected, its
+    rows are retried one by one so a single bad row only fails its own
+    request. A failed COMMIT fails the whole batch instead: it may have
+    gone through, and retrying could write every entry twice.
+    """
+
+    def __init__(self, window: float, max_rows: int):
+        self.window = window
+        self.max_rows = max_rows
+        self.batches = 0
+        self.rows = 0
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _ensure_started(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run(self._queue), name="mood-writer")
+        return self._queue
+
+    async def submit(self, row: dict) -> int:
+        """Queue `row` and return its id once the batch holding it is committed."""
+        future = asyncio.get_running_loop().create_future()
+        self._ensure_started().put_nowait((row, future))
+        # shield: a client disconnect must not cancel a write that may
+        # already be in flight; the row is committed either way.
+        return await asyncio.shield(future)
+
+    async def stop(self) -> None:
+        """Flush whatever is queued and stop the background task."""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> dict:
+        return {"batches": self.batches, "rows": self.rows}
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_rows:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _flush(self, batch: list[tuple[dict, asyncio.Future]]) -> None:
+        try:
+            ids = await self._insert([row for row, _ in batch])
+        except BatchRejected as e:
+            if len(batch) == 1:
+                _fail(batch, e.__cause__ or e)
+                return
+            logger.warning("group commit of %d moods failed, retrying singly", len(batch), exc_info=True)
+            for item in batch:
+                await self._flush([item])
+            return
+        except Exception as e:
+            logger.error("commit of %d moods failed", len(batch), exc_info=True)
+            _fail(batch, e)
+            return
+
+        self.batches += 1
+        self.rows += len(ids)
+        for (_, future), entry_id in zip(batch, ids):
+            if not future.done():
+                future.set_result(entry_id)
+
+    async def _insert(self, rows: list[dict]) -> list[int]:
+        async with AsyncSessionLocal() as db:
+            try:
+                result = await db.execute(
+                    insert(MoodEntry).returning(MoodEntry.id, sort_by_parameter_order=True),
+                    rows,
+                )
+                ids = list(result.scalars())
+            except Exception as e:
+                raise BatchRejected() from e
+            await db.commit()
+        return ids
+
+
+def _fail(batch: list[tuple[dict, asyncio.Future]], error: BaseException) -> None:
+    for _, future in batch:
+        if not future.done():
+            future.set_exception(error)
+
+
+mood_writer = MoodWriter(
+    window=settings.MOODS_GROUP_COMMIT_WINDOW_MS / 1000,
+    max_rows=settings.MOODS_GROUP_COMMIT_MAX_ROWS,
+)
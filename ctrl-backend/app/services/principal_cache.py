@@ -0,0 +1,53 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.models.user import User
+from app.utils.ttl_cache import TTLCache
+
+
+@dataclass(frozen=True, slots=True)
+class UserSnapshot:
+    """Immutable, session-free view of the authenticated user."""
+
+    id: int
+    email: str | None
+    created_at: datetime | None
+    token_version: int = 0
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            email=user.email,
+            created_at=user.created_at,
+            token_version=user.token_version or 0,
+        )
+
+
+# user id -> UserSnapshot
+principal_cache = TTLCache(
+    max_size=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL,
+)
+
+
+# firebase uid -> user id; the mapping never changes while the row exists.
+firebase_user_ids = TTLCache(
+    max_size=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.FIREBASE_UID_CACHE_TTL,
+)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_principal(mapper, connection, target: User) -> None:
+    principal_cache.discard(target.id)
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_firebase_uid(mapper, connection, target: User) -> None:
+    if target.firebase_uid is not None:
+        firebase_user_ids.discard(target.firebase_uid)
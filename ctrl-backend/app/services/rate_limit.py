@@ -0,0 +1,155 @@
+import importlib
+import math
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Protocol, runtime_checkable
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+
+from app.auth import verify_token
+from app.core.config import settings
+from app.utils.token_bucket import TokenBucketStore
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_RULE_RE = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day)s?\s*$")
+
+
+@dataclass(frozen=True, slots=True)
+class RateLimit:
+    """`capacity` requests per `period` seconds, allowed in a burst."""
+
+    capacity: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+
+@lru_cache(maxsize=None)
+def parse_rate_limit(raw: str) -> RateLimit | None:
+    """Parse "10/minute" or "100/5minutes"; empty or "0/..." disables the limit."""
+    if not raw or not raw.strip():
+        return None
+    match = _RULE_RE.match(raw)
+    if match is None:
+        raise ValueError(f"Invalid rate limit {raw!r}, expected e.g. '10/minute'")
+    count, multiple, unit = match.groups()
+    if int(count) == 0:
+        return None
+    return RateLimit(int(count), int(multiple or 1) * _PERIODS[unit])
+
+
+# Rule name -> Settings attribute, so limits can be tuned per route.
+RULES = {
+    "signup_ip": "RATE_LIMIT_SIGNUP_IP",
+    "login_ip": "RATE_LIMIT_LOGIN_IP",
+    "login_account": "RATE_LIMIT_LOGIN_ACCOUNT",
+    "moods_write_user": "RATE_LIMIT_MOODS_WRITE_USER",
+}
+
+
+@runtime_checkable
+class RateLimitBackend(Protocol):
+    """
+    Where token buckets live.
+
+    take() spends `cost` tokens from `key`'s bucket, which holds up to
+    `capacity` tokens and refills at `rate` per second. It returns 0 when
+    the tokens were taken, otherwise the seconds until enough will have
+    refilled, without taking any. It must be atomic per key across every
+    caller sharing the backend. clear() empties all buckets.
+    """
+
+    def take(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float: ...
+
+    def clear(self) -> None: ...
+
+
+def load_backend(spec: str) -> RateLimitBackend:
+    """
+    Build the backend named by RATE_LIMIT_BACKEND.
+
+    "memory" is the in-process store (limits are per worker), "database"
+    shares buckets through the rate_limit_buckets table, and "module:attr"
+    names a factory returning any other RateLimitBackend.
+    """
+    if spec == "memory":
+        return TokenBucketStore(
+            shards=settings.RATE_LIMIT_SHARDS, max_keys=settings.RATE_LIMIT_MAX_KEYS
+        )
+    if spec == "database":
+        from app.database import engine
+        from app.services.rate_limit_store import DatabaseTokenBucketStore
+
+        return DatabaseTokenBucketStore(engine)
+
+    module_name, _, attr = spec.partition(":")
+    if not module_name or not attr:
+        raise ValueError(
+            f"RATE_LIMIT_BACKEND={spec!r}: expected 'memory', 'database' or 'module:factory'"
+        )
+    try:
+        factory = getattr(importlib.import_module(module_name), attr)
+    except (ImportError, AttributeError) as e:
+        raise ValueError(f"RATE_LIMIT_BACKEND={spec!r}: cannot load factory ({e})") from e
+    backend = factory()
+    if not isinstance(backend, RateLimitBackend):
+        raise ValueError(
+            f"RATE_LIMIT_BACKEND={spec!r}: {type(backend).__name__} has no take()/clear()"
+        )
+    return backend
+
+
+# Loaded at import, so a bad RATE_LIMIT_BACKEND stops the app from starting.
+rate_limiter = load_backend(settings.RATE_LIMIT_BACKEND)
+
+
+def enforce(rule: str, key: str) -> None:
+    """Spend one token for `key` under `rule`, raising 429 when none is left."""
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    limit = parse_rate_limit(getattr(settings, RULES[rule]))
+    if limit is None:
+        return
+    retry_after = rate_limiter.take(f"{rule}:{key}", limit.rate, limit.capacity)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+async def enforce_async(rule: str, key: str) -> None:
+    """enforce() for use inside async routes."""
+    if isinstance(rate_limiter, TokenBucketStore):
+        enforce(rule, key)  # in-process, never blocks
+    else:
+        # A shared backend does I/O; keep it off the event loop.
+        await run_in_threadpool(enforce, rule, key)
+
+
+def client_ip(request: Request) -> str:
+    # Behind a proxy, run uvicorn with --proxy-headers so this is the real client.
+    return request.client.host if request.client else "unknown"
+
+
+def limit_ip(rule: str):
+    """Dependency enforcing `rule` per client IP."""
+
+    def dependency(request: Request) -> None:
+        enforce(rule, client_ip(request))
+
+    return dependency
+
+
+def limit_firebase_user(rule: str):
+    """Dependency enforcing `rule` per Firebase uid, ahead of any DB lookup."""
+
+    def dependency(decoded=Depends(verify_token)) -> None:
+        enforce(rule, decoded["uid"])
+
+    return dependency
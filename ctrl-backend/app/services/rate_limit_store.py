@@ -0,0 +1,74 @@
+import logging
+import random
+import time
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models.rate_limit import RateLimitBucket
+
+logger = logging.getLogger("ctrl-backend")
+
+# A bucket untouched this long has refilled under any rule (the longest
+# period is a day), so its row can go.
+_STALE_AFTER = 86400
+
+
+class DatabaseTokenBucketStore:
+    """
+    Token buckets kept in the rate_limit_buckets table, so every worker
+    and instance draws from the same budget.
+
+    Each take() is one short transaction that locks the bucket's row
+    (SELECT ... FOR UPDATE on PostgreSQL; SQLite serializes writers), so
+    concurrent requests can't both spend the last token. If the database
+    can't be reached the request is let through and a warning logged:
+    the limiter must not turn a DB blip into an outage of its own.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+
+    def _insert(self):
+        if self.engine.dialect.name == "postgresql":
+            return pg_insert(RateLimitBucket)
+        return sqlite_insert(RateLimitBucket)
+
+    def take(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        """Same contract as TokenBucketStore.take()."""
+        now = time.time()
+        try:
+            with self.engine.begin() as conn:
+                if random.random() < 0.001:
+                    conn.execute(delete(RateLimitBucket).where(
+                        RateLimitBucket.updated_at < now - _STALE_AFTER
+                    ))
+                conn.execute(
+                    self._insert()
+                    .values(key=key, tokens=capacity, updated_at=now)
+                    .on_conflict_do_nothing(index_elements=["key"])
+                )
+                stored, updated_at = conn.execute(
+                    select(RateLimitBucket.tokens, RateLimitBucket.updated_at)
+                    .where(RateLimitBucket.key == key)
+                    .with_for_update()
+                ).one()
+
+                tokens = min(capacity, stored + max(now - updated_at, 0.0) * rate)
+                taken = tokens >= cost
+                conn.execute(
+                    update(RateLimitBucket)
+                    .where(RateLimitBucket.key == key)
+                    .values(tokens=tokens - cost if taken else tokens, updated_at=now)
+                )
+        except SQLAlchemyError:
+            logger.warning("rate limit store unavailable, allowing request", exc_info=True)
+            return 0.0
+        return 0.0 if taken else (cost - tokens) / rate
+
+    def clear(self) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(delete(RateLimitBucket))
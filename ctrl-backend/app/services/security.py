@@ -1,3 +1,6 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
 import bcrypt
@@ -6,12 +9,71 @@ from app.core.config import settings  # FIXED IMPORT
 from app.schemas.auth import TokenData
 
 
-def hash_password(password: str) -> str:
+# bcrypt work factor for new hashes; BCRYPT_ROUNDS or a startup calibration sets it.
+_bcrypt_rounds = settings.BCRYPT_ROUNDS
+
+
+def bcrypt_rounds() -> int:
+    return _bcrypt_rounds
+
+
+def set_bcrypt_rounds(rounds: int) -> None:
+    global _bcrypt_rounds
+    _bcrypt_rounds = rounds
+
+
+def hash_rounds(hashed_password: str) -> int | None:
+    """Work factor recorded in a "$2b$12$..." hash."""
+    parts = hashed_password.split("$")
+    try:
+        return int(parts[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    return hash_rounds(hashed_password) != _bcrypt_rounds
+
+
+def _time_hash(rounds: int, samples: int = 3) -> float:
+    """Fastest of `samples` hashes at `rounds`, in milliseconds."""
+    salt = bcrypt.gensalt(rounds=rounds)
+    best = float("inf")
+    for _ in range(samples):
+        started = time.perf_counter()
+        bcrypt.hashpw(b"calibration-password", salt)
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return best
+
+
+def calibrate_bcrypt_rounds(
+    target_ms: float, min_rounds: int, max_rounds: int
+) -> tuple[int, dict[int, float]]:
+    """
+    Pick the highest work factor whose hash time stays within target_ms
+    on this CPU, never going below min_rounds.
+
+    Each extra round doubles the cost, so rounds are measured upwards
+    from min_rounds until one overshoots. Returns (rounds, {rounds: ms}).
+    """
+    timings = {}
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        timings[rounds] = _time_hash(rounds)
+        if timings[rounds] > target_ms:
+            break
+        chosen = rounds
+    return chosen, timings
+
+
+def hash_password(password: str, rounds: int | None = None) -> str:
     """Hash a password using bcrypt."""
     # Convert password to bytes if it's a string
     password_bytes = password.encode('utf-8') if isinstance(password, str) else password
-    # Generate salt and hash password
-    salt = bcrypt.gensalt()
+    # Generate salt and hash password; the cost is recorded in the hash.
+    # Rounds are passed in explicitly so process-pool workers use the
+    # parent's (possibly calibrated) setting.
+    salt = bcrypt.gensalt(rounds=rounds or _bcrypt_rounds)
     hashed = bcrypt.hashpw(password_bytes, salt)
     # Return as string (bcrypt hash is already base64 encoded)
     return hashed.decode('utf-8')
@@ -26,6 +88,71 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(password_bytes, hash_bytes)
 
 
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing queue is full."""
+
+
+_hash_executor: Executor | None = None
+_hash_in_flight = 0
+
+
+def _get_hash_executor() -> Executor:
+    global _hash_executor
+    if _hash_executor is None:
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _hash_executor = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+            )
+        else:
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix="password-hash",
+            )
+    return _hash_executor
+
+
+async def _run_hash_job(func, *args):
+    # The counter is only touched from the event loop, so it needs no lock.
+    global _hash_in_flight
+    capacity = settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE
+    if _hash_in_flight >= capacity:
+        raise PasswordHasherBusy()
+
+    _hash_in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_hash_executor(), func, *args)
+    finally:
+        _hash_in_flight -= 1
+
+
+async def calibrate_password_hashing() -> tuple[int, float]:
+    """
+    Calibrate on the hashing pool with the BCRYPT_* settings and switch
+    new hashes to the result. Returns (rounds, ms per hash at that cost).
+    """
+    loop = asyncio.get_running_loop()
+    rounds, timings = await loop.run_in_executor(
+        _get_hash_executor(),
+        calibrate_bcrypt_rounds,
+        settings.BCRYPT_TARGET_MS,
+        settings.BCRYPT_MIN_ROUNDS,
+        settings.BCRYPT_MAX_ROUNDS,
+    )
+    set_bcrypt_rounds(rounds)
+    return rounds, timings[rounds]
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the bounded hashing pool."""
+    return await _run_hash_job(hash_password, password, _bcrypt_rounds)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the bounded hashing pool."""
+    return await _run_hash_job(verify_password, plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
 
@@ -44,6 +171,16 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     return encoded
 
 
+def principal_claims(user) -> dict:
+    """Claims that let a request rebuild the principal without a DB lookup."""
+    return {
+        "sub": str(user.id),
+        "email": user.email,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+        "ver": user.token_version or 0,
+    }
+
+
 def decode_access_token(token: str) -> TokenData:
     try:
         payload = jwt.decode(
@@ -58,6 +195,11 @@ def decode_access_token(token: str) -> TokenData:
                 user_id = int(user_id)
             except (ValueError, TypeError):
                 return None
-        return TokenData(user_id=user_id)
-    except JWTError:
+        return TokenData(
+            user_id=user_id,
+            email=payload.get("email"),
+            created_at=payload.get("created_at"),
+            token_version=payload.get("ver"),
+        )
+    except (JWTError, ValueError):
         return None
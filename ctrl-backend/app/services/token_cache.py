@@ -0,0 +1,28 @@
+import hashlib
+
+from app.utils.ttl_cache import TTLCache
+
+
+class TokenCache(TTLCache):
+    """
+    In-process cache of verified ID token claims.
+
+    Entries are keyed by a SHA-256 of the raw token (the token itself is
+    never stored), live until the token's own `exp`, and are evicted in
+    LRU order once `max_size` is reached.
+    """
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> dict | None:
+        return super().get(self._key(token))
+
+    def put(self, token: str, claims: dict) -> None:
+        expires_at = claims.get("exp")
+        if expires_at:
+            super().put(self._key(token), claims, expires_at=expires_at)
+
+    def discard(self, token: str) -> None:
+        super().discard(self._key(token))
@@ -0,0 +1,110 @@
+"""
+Access-token revocation for stateless principals.
+
+Every user row carries a token_version that tokens embed as "ver";
+bumping it revokes all tokens issued before. With STATELESS_PRINCIPAL the
+request path never reads the users table, so each instance keeps the
+versions of the (few) users that have ever revoked in memory and reloads
+them in the background.
+"""
+import asyncio
+import logging
+import time
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database import AsyncSessionLocal
+from app.models.user import User
+from app.services.principal_cache import principal_cache
+
+logger = logging.getLogger("ctrl-backend")
+
+
+class TokenVersions:
+    """In-memory map of user id -> token_version for every version above 0."""
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self.loaded_at = 0.0
+        self._versions: dict[int, int] = {}
+        self._task: asyncio.Task | None = None
+
+    def current(self, user_id: int) -> int:
+        return self._versions.get(user_id, 0)
+
+    def is_revoked(self, user_id: int, version: int) -> bool:
+        return version < self.current(user_id)
+
+    @property
+    def fresh(self) -> bool:
+        """Whether the map is recent enough to stand in for the DB."""
+        return time.monotonic() - self.loaded_at < 3 * self.refresh_interval
+
+    def record(self, user_id: int, version: int) -> None:
+        if version > self._versions.get(user_id, 0):
+            self._versions[user_id] = version
+
+    def clear(self) -> None:
+        self._versions = {}
+        self.loaded_at = 0.0
+
+    async def refresh(self) -> int:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(User.id, User.token_version).where(User.token_version > 0)
+            )
+            loaded = dict(result.all())
+        # revoke_tokens may have recorded a bump the SELECT didn't see yet;
+        # versions only ever grow, so keep the larger of the two.
+        for user_id, version in self._versions.items():
+            if version > loaded.get(user_id, 0):
+                loaded[user_id] = version
+        self._versions = loaded
+        self.loaded_at = time.monotonic()
+        return len(self._versions)
+
+    async def _run(self) -> None:
+        # Load right away if prewarm didn't (disabled or failed).
+        delay = self.refresh_interval if self.loaded_at else 0.0
+        while True:
+            await asyncio.sleep(delay)
+            delay = self.refresh_interval
+            try:
+                await self.refresh()
+            except Exception:
+                # Once the map goes stale get_current_user falls back to the DB.
+                logger.warning("token version refresh failed", exc_info=True)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+token_versions = TokenVersions(settings.TOKEN_VERSION_REFRESH)
+
+
+async def revoke_tokens(db: AsyncSession, user_id: int) -> int:
+    """Invalidate every access token issued to the user so far."""
+    result = await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(token_version=User.token_version + 1)
+        .returning(User.token_version)
+    )
+    version = result.scalar_one()
+    await db.commit()
+    # A Core UPDATE skips the ORM events that normally drop the snapshot.
+    principal_cache.discard(user_id)
+    token_versions.record(user_id, version)
+    return version
@@ -1,14 +1,222 @@
+import atexit
+import contextvars
+import copy
+import json
 import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+from app.core.config import settings
+from app.utils.routes import route_template
 
 logger = logging.getLogger("ctrl-backend")
-logging.basicConfig(level=logging.INFO)
 
-def log_api_call(path: str, user_id: str | None = None, extra: dict | None = None):
+# Per-request fields (request_id, user_id, ...) merged into every log line.
+# The dict is shared, so fields bound inside a threadpool dependency are
+# still visible to the middleware that writes the access line.
+_log_context: contextvars.ContextVar[dict | None] = contextvars.ContextVar(
+    "log_context", default=None
+)
+# ASGI scope of the current request, so api_call lines are keyed (and
+# sampled) by the same route template as its access line.
+_request_scope: contextvars.ContextVar[dict | None] = contextvars.ContextVar(
+    "request_scope", default=None
+)
+
+# LogRecord attributes that are not user-supplied `extra` fields.
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message",
+    "asctime",
+    "taskName",
+}
+
+
+class JsonFormatter(logging.Formatter):
+    """Single-line JSON: timestamp, level, message, request context and extras."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        payload.update(getattr(record, "log_context", None) or {})
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key != "log_context":
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, separators=(",", ":"))
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks the caller.
+
+    Formatting and I/O happen on the QueueListener thread; when the queue
+    is full the record is dropped and counted instead of waiting.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve args and capture the request context now; the expensive
+        # JSON formatting is left to the listener thread.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        record.log_context = dict(_log_context.get() or {})
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_queue_handler: BoundedQueueHandler | None = None
+_listener: logging.handlers.QueueListener | None = None
+
+
+def setup_logging() -> None:
+    """Route the app logger through a bounded queue to a JSON stdout writer."""
+    global _queue_handler, _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _queue_handler = BoundedQueueHandler(log_queue)
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    logger.addHandler(_queue_handler)
+    logger.setLevel(settings.LOG_LEVEL)
+    logger.propagate = False
+
+
+def logging_stats() -> dict:
+    if _queue_handler is None:
+        return {"queued": 0, "dropped": 0, "capacity": 0}
+    return {
+        "queued": _queue_handler.queue.qsize(),
+        "dropped": _queue_handler.dropped,
+        "capacity": settings.LOG_QUEUE_SIZE,
+    }
+
+
+def _parse_sample_rates(raw: str) -> dict[str, float]:
+    rates = {}
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        path, _, rate = item.partition("=")
+        rates[path.strip()] = float(rate)
+    return rates
+
+
+_sample_rates = _parse_sample_rates(settings.LOG_SAMPLE_RATES)
+
+
+def _sample_rate(path: str) -> float:
+    return _sample_rates.get(path, 1.0)
+
+
+def bind_log_context(**fields) -> None:
+    """Attach fields (e.g. user_id) to the current request's log lines."""
+    context = _log_context.get()
+    if context is not None:
+        context.update(fields)
+
+
+def log_api_call(user_id: str | None = None, extra: dict | None = None):
+    """Log an "api_call" line for the current request's route."""
+    scope = _request_scope.get()
+    path = route_template(scope) if scope is not None else None
+    rate = _sample_rate(path) if path is not None else 1.0
+    if rate < 1.0 and random.random() >= rate:
+        return
     logger.info(
         "api_call",
         extra={
             "path": path,
             "user_id": user_id,
             "extra": extra or {},
+            "sample_rate": rate,
         },
     )
+
+
+class RequestLoggingMiddleware:
+    """
+    Pure ASGI middleware writing one access line per request.
+
+    Assigns a request id (honouring an incoming X-Request-ID), echoes it
+    on the response, and logs path, status, user_id and latency. Routes
+    listed in LOG_SAMPLE_RATES are sampled; 5xx responses always log.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:128]
+                break
+        context = {"request_id": request_id or uuid.uuid4().hex}
+        token = _log_context.set(context)
+        scope_token = _request_scope.set(scope)
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-request-id", context["request_id"].encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            path = route_template(scope)
+            rate = _sample_rate(path)
+            if status_code >= 500 or rate >= 1.0 or random.random() < rate:
+                logger.info(
+                    "request",
+                    extra={
+                        "method": scope["method"],
+                        "path": path,
+                        "status": status_code,
+                        "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+                        "sample_rate": rate,
+                    },
+                )
+            _log_context.reset(token)
+            _request_scope.reset(scope_token)
+
+
+setup_logging()
@@ -0,0 +1,182 @@
+import bisect
+import threading
+import time
+
+from app.utils.routes import route_template
+
+# Seconds; tuned for request latencies in the 1ms-10s range.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram, cheap enough to update on every request."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """(upper bound, cumulative count) pairs, ending with +Inf."""
+        with self._lock:
+            counts = list(self._counts)
+        running = 0
+        result = []
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            running += count
+            result.append((bound, running))
+        return result
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {
+                ("+Inf" if bound == float("inf") else str(bound)): count
+                for bound, count in self.cumulative()
+            },
+        }
+
+
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    inner = ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+    return "{" + inner + "}" if inner else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_histogram(lines: list[str], name: str, histogram: Histogram, **labels) -> None:
+    for bound, count in histogram.cumulative():
+        lines.append(f"{name}_bucket{_labels(**labels, le=_format_value(bound))} {count}")
+    lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum!r}")
+    lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+
+
+class RequestMetrics:
+    """Per-route request latency, size and in-flight tracking."""
+
+    def __init__(self):
+        self.latency: dict[tuple[str, str, str], Histogram] = {}
+        self.request_size: dict[tuple[str, str], Histogram] = {}
+        self.response_size: dict[tuple[str, str], Histogram] = {}
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def _histogram(self, family: dict, key: tuple, buckets) -> Histogram:
+        histogram = family.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = family.setdefault(key, Histogram(buckets))
+        return histogram
+
+    def request_started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        duration: float,
+        request_bytes: int,
+        response_bytes: int,
+    ) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        self._histogram(self.latency, (method, route, str(status)), DEFAULT_BUCKETS).observe(duration)
+        self._histogram(self.request_size, (method, route), SIZE_BUCKETS).observe(request_bytes)
+        self._histogram(self.response_size, (method, route), SIZE_BUCKETS).observe(response_bytes)
+
+    def render(self, lines: list[str]) -> None:
+        lines.append("# HELP http_request_duration_seconds Request latency by route and status.")
+        lines.append("# TYPE http_request_duration_seconds histogram")
+        for (method, route, status), histogram in sorted(self.latency.items()):
+            render_histogram(
+                lines, "http_request_duration_seconds", histogram,
+                method=method, route=route, status=status,
+            )
+
+        for name, family, help_text in (
+            ("http_request_size_bytes", self.request_size, "Request body size by route."),
+            ("http_response_size_bytes", self.response_size, "Response body size by route."),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (method, route), histogram in sorted(family.items()):
+                render_histogram(lines, name, histogram, method=method, route=route)
+
+        lines.append("# HELP http_requests_in_flight Requests currently being served.")
+        lines.append("# TYPE http_requests_in_flight gauge")
+        lines.append(f"http_requests_in_flight {self.in_flight}")
+
+
+request_metrics = RequestMetrics()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware feeding request_metrics."""
+
+    def __init__(self, app, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        request_bytes = 0
+        response_bytes = 0
+
+        async def receive_wrapper():
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        self.metrics.request_started()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            # Unmatched paths share one label so 404 scans can't blow up cardinality.
+            route = route_template(scope) if scope.get("route") is not None else "<unmatched>"
+            self.metrics.request_finished(
+                scope["method"],
+                route,
+                status_code,
+                time.perf_counter() - start,
+                request_bytes,
+                response_bytes,
+            )
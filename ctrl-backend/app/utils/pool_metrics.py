@@ -0,0 +1,97 @@
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+from app.utils.metrics import Histogram
+
+WAIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0)
+
+
+class PoolMetrics:
+    """
+    Counters for one connection pool, fed by SQLAlchemy pool events.
+
+    Checkout wait time cannot be seen from events alone, so it is timed
+    by the pool class returned from instrumented_pool_class().
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wait_time = Histogram(WAIT_BUCKETS)
+        self.checkouts = 0
+        self.connects = 0
+        self.overflow_connects = 0
+        self.invalidations = 0
+        self.soft_invalidations = 0
+        self.timeouts = 0
+        self._engine: Engine | None = None
+        self._lock = threading.Lock()
+
+    def _incr(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def listen(self, engine: Engine) -> None:
+        """Attach to an engine's pool (and any pool it is recreated as)."""
+        self._engine = engine
+
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            self._incr("connects")
+            overflow = getattr(engine.pool, "overflow", None)
+            if overflow is not None and overflow() > 0:
+                self._incr("overflow_connects")
+
+        @event.listens_for(engine, "checkout")
+        def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+            self._incr("checkouts")
+
+        @event.listens_for(engine, "invalidate")
+        def _on_invalidate(dbapi_connection, connection_record, exception):
+            self._incr("invalidations")
+
+        @event.listens_for(engine, "soft_invalidate")
+        def _on_soft_invalidate(dbapi_connection, connection_record, exception):
+            self._incr("soft_invalidations")
+
+    def snapshot(self) -> dict:
+        pool = self._engine.pool if self._engine is not None else None
+        status = {}
+        if pool is not None and hasattr(pool, "checkedout"):
+            status = {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            }
+        return {
+            "pool": status,
+            "checkouts": self.checkouts,
+            "connects": self.connects,
+            "overflow_connects": self.overflow_connects,
+            "invalidations": self.invalidations,
+            "soft_invalidations": self.soft_invalidations,
+            "timeouts": self.timeouts,
+            "wait_seconds": self.wait_time.snapshot(),
+        }
+
+
+def instrumented_pool_class(base: type[Pool], metrics: PoolMetrics) -> type[Pool]:
+    """Subclass `base` so every checkout's wait (incl. pre-ping) is timed."""
+
+    class InstrumentedPool(base):
+        def connect(self):
+            start = time.perf_counter()
+            try:
+                return super().connect()
+            except exc.TimeoutError:
+                metrics._incr("timeouts")
+                raise
+            finally:
+                metrics.wait_time.observe(time.perf_counter() - start)
+
+    InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+    return InstrumentedPool
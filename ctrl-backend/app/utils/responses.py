@@ -0,0 +1,18 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson.
+
+    For handlers that build plain lists/dicts themselves (e.g. straight
+    from row tuples) and return this directly, skipping response_model
+    validation and jsonable_encoder. datetime values are written as
+    ISO 8601 natively.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,25 @@
+def route_template(scope) -> str:
+    """
+    Path template of the matched route (e.g. "/api/v1/moods/{id}").
+
+    Keeps per-route logs and metrics low-cardinality. Depending on the
+    FastAPI version, scope["route"] is the route as declared on its
+    APIRouter, i.e. without the include_router prefix, so the prefix is
+    recovered from the concrete path. Unmatched requests fall back to the
+    raw path.
+    """
+    path = scope["path"]
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    regex = getattr(route, "path_regex", None)
+    if template is None or regex is None:
+        return path
+    if regex.match(path):
+        return template
+
+    index = path.find("/", 1)
+    while index != -1:
+        if regex.match(path[index:]):
+            return path[:index] + template
+        index = path.find("/", index + 1)
+    return template
@@ -1,5 +1,9 @@
+import hashlib
+import json
+
 from fastapi.openapi.utils import get_openapi
 
+
 def fix_swagger_login(app):
     openapi_schema = get_openapi(
         title=app.title,
@@ -19,3 +23,30 @@ def fix_swagger_login(app):
 
     openapi_schema["paths"] = corrected_paths
     return openapi_schema
+
+
+def _routes_fingerprint(app):
+    # Route objects are only ever added/removed, never mutated in place,
+    # so their identities are enough to tell when the schema is stale.
+    return tuple(id(route) for route in app.routes)
+
+
+def cached_openapi(app):
+    """
+    Return (schema, body, etag) for the corrected OpenAPI schema.
+
+    The schema is built once and kept on app.state together with its
+    serialized bytes and a strong ETag; it is only rebuilt when the
+    registered routes change.
+    """
+    fingerprint = _routes_fingerprint(app)
+    cached = getattr(app.state, "openapi_cache", None)
+
+    if cached is None or cached[0] != fingerprint:
+        schema = fix_swagger_login(app)
+        body = json.dumps(schema, separators=(",", ":")).encode("utf-8")
+        etag = '"' + hashlib.sha256(body).hexdigest() + '"'
+        cached = (fingerprint, schema, body, etag)
+        app.state.openapi_cache = cached
+
+    return cached[1], cached[2], cached[3]
@@ -0,0 +1,57 @@
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+
+class TokenBucketStore:
+    """
+    In-memory token buckets, sharded so concurrent requests for different
+    keys rarely contend on the same lock.
+
+    Each bucket holds up to `capacity` tokens and refills at `rate` tokens
+    per second. Shards are LRU-bounded; an evicted bucket simply starts
+    full again, which errs on the side of letting a request through.
+    """
+
+    def __init__(self, shards: int = 16, max_keys: int = 100_000):
+        self._shards = [
+            (threading.Lock(), OrderedDict()) for _ in range(max(shards, 1))
+        ]
+        self._max_per_shard = max(max_keys // len(self._shards), 1)
+
+    def _shard(self, key: str) -> tuple[threading.Lock, OrderedDict]:
+        return self._shards[zlib.crc32(key.encode()) % len(self._shards)]
+
+    def take(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        """
+        Take `cost` tokens from `key`'s bucket.
+
+        Returns 0 when the tokens were taken, otherwise the number of
+        seconds until enough will have refilled (nothing is taken).
+        """
+        now = time.monotonic()
+        lock, buckets = self._shard(key)
+        with lock:
+            bucket = buckets.get(key)
+            if bucket is None:
+                tokens = capacity
+                if len(buckets) >= self._max_per_shard:
+                    buckets.popitem(last=False)
+            else:
+                tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+                buckets.move_to_end(key)
+
+            if tokens >= cost:
+                buckets[key] = (tokens - cost, now)
+                return 0.0
+            buckets[key] = (tokens, now)
+            return (cost - tokens) / rate
+
+    def clear(self) -> None:
+        for lock, buckets in self._shards:
+            with lock:
+                buckets.clear()
+
+    def __len__(self) -> int:
+        return sum(len(buckets) for _, buckets in self._shards)
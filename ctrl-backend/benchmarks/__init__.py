@@ -0,0 +1,8 @@
+"""
+HTTP load harness for the CTRL API.
+
+Boots the app under uvicorn against a throwaway SQLite file (or a
+Postgres URL), seeds users and moods, drives a concurrent async workload
+and reports per-endpoint throughput, latency percentiles and error rates
+as JSON. Run with `python -m benchmarks --help` from ctrl-backend/.
+"""
@@ -0,0 +1,122 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Load-test the CTRL API under uvicorn and report per-endpoint latency.",
+    )
+    parser.add_argument(
+        "--database-url",
+        help="Sync SQLAlchemy URL; defaults to a temporary SQLite file. "
+        "Its tables are DROPPED and recreated, see --reset",
+    )
+    parser.add_argument(
+        "--reset", action="store_true",
+        help="Allow dropping --database-url tables that already contain rows",
+    )
+    parser.add_argument("--users", type=int, default=50, help="Seeded users (default: 50)")
+    parser.add_argument("--moods-per-user", type=int, default=200, help="Seeded moods per user (default: 200)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent workers (default: 32)")
+    parser.add_argument("--duration", type=float, default=20, help="Measured seconds (default: 20)")
+    parser.add_argument("--warmup", type=float, default=3, help="Unmeasured warm-up seconds (default: 3)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes (default: 1)")
+    parser.add_argument(
+        "--mix",
+        help="Scenario weights, e.g. 'login=2,auth_me=6,list_moods=6' "
+        "(scenarios: signup, login, auth_me, list_moods, create_mood)",
+    )
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for data and request mix")
+    parser.add_argument(
+        "--env", action="append", default=[], metavar="KEY=VALUE",
+        help="Extra environment for the server, e.g. --env DB_POOL_SIZE=20 (repeatable)",
+    )
+    parser.add_argument("--output", type=Path, help="Write the JSON report here as well as stdout")
+    parser.add_argument("--baseline", type=Path, help="Compare against a previously saved report")
+    parser.add_argument("--save-baseline", type=Path, help="Save this run's report as the new baseline")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.10,
+        help="Allowed relative p95/rps drift before flagging a regression (default: 0.10)",
+    )
+    parser.add_argument("--startup-timeout", type=float, default=30)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    extra_env = dict(item.split("=", 1) for item in args.env)
+
+    with tempfile.TemporaryDirectory(prefix="ctrl-bench-") as tmp:
+        workdir = Path(tmp)
+
+        # Settings is read at import, so app modules are only imported
+        # once the benchmark environment is in place.
+        from benchmarks import environment
+
+        signing_key = environment.configure(workdir, args.database_url, extra_env)
+
+        from benchmarks.report import compare, summarize
+        from benchmarks.workload import parse_mix, run_workload
+
+        mix = parse_mix(args.mix)
+        try:
+            users = environment.seed(
+                args.users, args.moods_per_user, signing_key, random.Random(args.seed), reset=args.reset
+            )
+        except RuntimeError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 2
+        process, base_url, log_path = environment.start_server(workdir, args.workers, args.startup_timeout)
+        try:
+            samples, elapsed = asyncio.run(
+                run_workload(
+                    base_url, users, mix,
+                    concurrency=args.concurrency,
+                    duration=args.duration,
+                    warmup=args.warmup,
+                    seed=args.seed,
+                )
+            )
+        finally:
+            environment.stop_server(process)
+            server_log = log_path.read_text(errors="replace")
+
+    config = {
+        "database": "postgresql" if args.database_url and args.database_url.startswith("postgresql") else "sqlite",
+        "users": args.users,
+        "moods_per_user": args.moods_per_user,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "warmup_s": args.warmup,
+        "uvicorn_workers": args.workers,
+        "mix": mix,
+        "env": extra_env,
+    }
+    report = summarize(samples, elapsed, config)
+
+    exit_code = 0
+    if args.baseline:
+        report["comparison"] = compare(report, json.loads(args.baseline.read_text()), args.tolerance)
+        if report["comparison"]["regressions"]:
+            exit_code = 1
+    if report["overall"]["requests"] == 0:
+        print(server_log[-4000:], file=sys.stderr)
+        exit_code = 2
+
+    rendered = json.dumps(report, indent=2)
+    print(rendered)
+    if args.output:
+        args.output.write_text(rendered + "\n")
+    if args.save_baseline:
+        args.save_baseline.write_text(rendered + "\n")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
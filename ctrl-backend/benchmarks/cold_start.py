@@ -0,0 +1,145 @@
+"""
+Cold-start profile: per-module import time of app.main and wall time
+from launching uvicorn to the first successful response.
+
+    python -m benchmarks.cold_start                 # report + check the budget
+    python -m benchmarks.cold_start --runs 5 --top 30
+
+Each measurement runs in a fresh interpreter so nothing is already
+imported. The result is compared against cold_start_budget.json next to
+this file; the command exits with status 1 when a budget is exceeded.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+from benchmarks import environment
+
+BUDGET_PATH = Path(__file__).with_name("cold_start_budget.json")
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def profile_imports(top: int) -> dict:
+    """Run `python -X importtime -c "import app.main"` and summarise it."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=environment.BACKEND_DIR,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    modules = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us), len(indent)))
+
+    total_us = next(cumulative for name, _, cumulative, _ in modules if name == "app.main")
+
+    # Self time summed per top-level package shows which dependency to attack.
+    by_package: dict[str, int] = defaultdict(int)
+    for name, self_us, _, _ in modules:
+        by_package[name.partition(".")[0]] += self_us
+
+    return {
+        "total_ms": round(total_us / 1000, 1),
+        "modules": len(modules),
+        "top_cumulative": [
+            {"module": name, "cumulative_ms": round(cumulative / 1000, 1), "self_ms": round(self_us / 1000, 1)}
+            for name, self_us, cumulative, _ in sorted(modules, key=lambda m: m[2], reverse=True)[:top]
+        ],
+        "by_package_ms": {
+            package: round(us / 1000, 1)
+            for package, us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+        },
+    }
+
+
+def time_to_first_request(timeout: float) -> float:
+    """Seconds from spawning uvicorn to the first 200 from /api/v1/health."""
+    port = environment._free_port()
+    url = f"http://127.0.0.1:{port}/api/v1/health"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=environment.BACKEND_DIR,
+        env=os.environ.copy(),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(timeout=1) as client:
+            while time.perf_counter() - started < timeout:
+                if process.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with {process.returncode}")
+                try:
+                    if client.get(url).status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.005)
+        raise RuntimeError(f"no response within {timeout}s")
+    finally:
+        environment.stop_server(process)
+
+
+def check_budget(report: dict, budget: dict) -> list[str]:
+    over = []
+    if report["import"]["total_ms"] > budget["import_ms"]:
+        over.append(f"import app.main {report['import']['total_ms']}ms > {budget['import_ms']}ms")
+    if report["first_request_ms"]["median"] > budget["first_request_ms"]:
+        over.append(
+            f"first request {report['first_request_ms']['median']}ms > {budget['first_request_ms']}ms"
+        )
+    return over
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.cold_start", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=3, help="uvicorn boots to time; the median is used")
+    parser.add_argument("--top", type=int, default=20, help="Modules/packages listed in the import profile")
+    parser.add_argument("--budget", type=Path, default=BUDGET_PATH)
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="ctrl-cold-start-") as tmp:
+        environment.configure(Path(tmp), None, {})
+        imports = profile_imports(args.top)
+        boots = [time_to_first_request(args.timeout) * 1000 for _ in range(args.runs)]
+
+    report = {
+        "python": sys.version.split()[0],
+        "import": imports,
+        "first_request_ms": {
+            "runs": [round(ms, 1) for ms in boots],
+            "median": round(statistics.median(boots), 1),
+        },
+    }
+
+    exit_code = 0
+    if args.budget.exists():
+        budget = json.loads(args.budget.read_text())
+        report["budget"] = budget
+        report["over_budget"] = check_budget(report, budget)
+        exit_code = 1 if report["over_budget"] else 0
+
+    print(json.dumps(report, indent=2))
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
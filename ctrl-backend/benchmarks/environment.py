@@ -0,0 +1,225 @@
+"""
+Everything the workload needs before the first request: environment
+variables, a stand-in Firebase signing key, seeded rows and a running
+uvicorn process.
+
+`configure()` must run before any `app.*` import, since Settings reads
+the environment once at import time.
+"""
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+PROJECT_ID = "ctrl-bench"
+KEY_ID = "bench-kid"
+PASSWORD = "bench-password-123"
+
+
+@dataclass
+class SeededUser:
+    id: int
+    email: str
+    firebase_uid: str
+    access_token: str = ""
+    id_token: str = ""
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _generate_signing_key(workdir: Path) -> tuple[str, Path]:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    public = jwk.construct(private_pem, "RS256").public_key().to_dict()
+    public["kid"] = KEY_ID
+    jwks_path = workdir / "jwks.json"
+    jwks_path.write_text(json.dumps({"keys": [public]}))
+    return private_pem, jwks_path
+
+
+def configure(workdir: Path, database_url: str | None, extra_env: dict[str, str]) -> str:
+    """Point Settings at the benchmark database and stand-in Firebase keys."""
+    private_pem, jwks_path = _generate_signing_key(workdir)
+    os.environ.update(
+        {
+            "DATABASE_URL": database_url or f"sqlite:///{workdir / 'bench.db'}",
+            "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark-secret-key"),
+            "FIREBASE_PROJECT_ID": PROJECT_ID,
+            "FIREBASE_LOCAL_VERIFY": "true",
+            "FIREBASE_CERTS_URL": str(jwks_path),
+            "FIREBASE_CERTS_CACHE_PATH": str(workdir / "firebase_certs.json"),
+            "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+            # A handful of simulated clients share one IP; measure the app,
+            # not the limiter. Pass --env RATE_LIMIT_ENABLED=true to include it.
+            "RATE_LIMIT_ENABLED": "false",
+        }
+    )
+    os.environ.update(extra_env)
+    return private_pem
+
+
+def id_token(signing_key: str, uid: str, lifetime: int = 3600) -> str:
+    now = int(time.time())
+    claims = {
+        "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+        "aud": PROJECT_ID,
+        "sub": uid,
+        "iat": now,
+        "auth_time": now,
+        "exp": now + lifetime,
+    }
+    return jwt.encode(claims, signing_key, algorithm="RS256", headers={"kid": KEY_ID})
+
+
+def tables_with_rows(engine) -> list[str]:
+    """Model tables in the target database that already hold data."""
+    from sqlalchemy import exists, inspect, select
+
+    from app.database import Base
+
+    present = set(inspect(engine).get_table_names())
+    with engine.connect() as conn:
+        return [
+            table.name
+            for table in Base.metadata.sorted_tables
+            if table.name in present and conn.scalar(select(exists().select_from(table)))
+        ]
+
+
+def seed(
+    user_count: int,
+    moods_per_user: int,
+    signing_key: str,
+    rng: random.Random,
+    reset: bool = False,
+) -> list[SeededUser]:
+    """
+    Recreate the schema and insert users with a spread of past mood entries.
+
+    Dropping the tables destroys whatever the database holds, so a
+    database with data in it is refused unless `reset` is set.
+    """
+    from sqlalchemy import insert
+
+    from app.database import Base, engine
+    from app.models.mood import MoodEntry
+    from app.models.user import User
+    from app.services.security import create_access_token, hash_password
+
+    if not reset:
+        populated = tables_with_rows(engine)
+        if populated:
+            raise RuntimeError(
+                f"refusing to drop tables that contain data ({', '.join(populated)}); "
+                "pass --reset if this database is disposable"
+            )
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    # One bcrypt hash serves every seeded account; they share a password.
+    hashed = hash_password(PASSWORD)
+    now = datetime.now(timezone.utc)
+
+    with engine.begin() as conn:
+        rows = conn.execute(
+            insert(User).returning(User.id, User.email, User.firebase_uid, sort_by_parameter_order=True),
+            [
+                {
+                    "email": f"bench-{i}@example.com",
+                    "hashed_password": hashed,
+                    "firebase_uid": f"bench-uid-{i}",
+                    "created_at": now.replace(tzinfo=None),
+                }
+                for i in range(user_count)
+            ],
+        ).all()
+        users = [SeededUser(id=row.id, email=row.email, firebase_uid=row.firebase_uid) for row in rows]
+
+        moods = [
+            {
+                "user_id": user.id,
+                "mood": rng.choice(["calm", "happy", "tired", "anxious", "focused"]),
+                "mood_score": rng.randint(1, 10),
+                "energy_level": rng.randint(1, 10),
+                "stress_level": rng.randint(1, 10),
+                "created_at": now - timedelta(minutes=rng.randint(1, 60 * 24 * 365)),
+            }
+            for user in users
+            for _ in range(moods_per_user)
+        ]
+        for start in range(0, len(moods), 5000):
+            conn.execute(insert(MoodEntry), moods[start:start + 5000])
+
+    engine.dispose()
+
+    for user in users:
+        user.access_token = create_access_token({"sub": str(user.id)})
+        user.id_token = id_token(signing_key, user.firebase_uid)
+    return users
+
+
+def start_server(workdir: Path, workers: int, startup_timeout: float) -> tuple[subprocess.Popen, str, Path]:
+    port = _free_port()
+    log_path = workdir / "server.log"
+    log_file = log_path.open("wb")
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1",
+            "--port", str(port),
+            "--workers", str(workers),
+            "--log-level", "warning",
+            "--no-access-log",
+        ],
+        cwd=BACKEND_DIR,
+        env=os.environ.copy(),
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with {process.returncode}; see {log_path}")
+        try:
+            if httpx.get(f"{base_url}/api/v1/health", timeout=1).status_code == 200:
+                return process, base_url, log_path
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+
+    stop_server(process)
+    raise RuntimeError(f"uvicorn did not become healthy within {startup_timeout}s; see {log_path}")
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
@@ -0,0 +1,95 @@
+"""Summarise samples into per-endpoint stats and diff them against a baseline."""
+import math
+import platform
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+from benchmarks.workload import Sample
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list (q in 0-100)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def _stats(samples: list[Sample], elapsed: float) -> dict:
+    latencies = sorted(sample.latency * 1000 for sample in samples)
+    errors = sum(not sample.ok for sample in samples)
+    statuses = Counter("error" if s.status is None else str(s.status) for s in samples)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "rps": round(len(samples) / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(latencies[-1], 2) if latencies else 0.0,
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        },
+        "status_codes": dict(sorted(statuses.items())),
+    }
+
+
+def summarize(samples: list[Sample], elapsed: float, config: dict) -> dict:
+    by_scenario: dict[str, list[Sample]] = defaultdict(list)
+    for sample in samples:
+        by_scenario[sample.scenario].append(sample)
+
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": config,
+        "duration_s": round(elapsed, 2),
+        "overall": _stats(samples, elapsed),
+        "endpoints": {name: _stats(group, elapsed) for name, group in sorted(by_scenario.items())},
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> dict:
+    """
+    Diff `current` against `baseline` per endpoint.
+
+    A regression is a p95 more than `tolerance` slower, throughput more
+    than `tolerance` lower, or an error rate more than one point higher.
+    """
+    endpoints = {}
+    regressions = []
+    for name, now in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if before is None:
+            continue
+
+        p95_now, p95_before = now["latency_ms"]["p95"], before["latency_ms"]["p95"]
+        diff = {
+            "p95_ms": [p95_before, p95_now],
+            "p95_change": _change(p95_before, p95_now),
+            "rps": [before["rps"], now["rps"]],
+            "rps_change": _change(before["rps"], now["rps"]),
+            "error_rate": [before["error_rate"], now["error_rate"]],
+        }
+        endpoints[name] = diff
+
+        if p95_before and p95_now > p95_before * (1 + tolerance):
+            regressions.append(f"{name}: p95 {p95_before}ms -> {p95_now}ms")
+        if before["rps"] and now["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {before['rps']} -> {now['rps']}")
+        if now["error_rate"] > before["error_rate"] + 0.01:
+            regressions.append(f"{name}: error rate {before['error_rate']} -> {now['error_rate']}")
+
+    return {
+        "baseline_generated_at": baseline.get("generated_at"),
+        "tolerance": tolerance,
+        "endpoints": endpoints,
+        "regressions": regressions,
+    }
+
+
+def _change(before: float, now: float) -> float | None:
+    if not before:
+        return None
+    return round((now - before) / before, 4)
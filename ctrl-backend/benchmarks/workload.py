@@ -0,0 +1,144 @@
+"""Weighted mix of API calls driven by a fixed number of concurrent workers."""
+import asyncio
+import itertools
+import random
+import time
+import uuid
+from dataclasses import dataclass
+
+import httpx
+
+from benchmarks.environment import PASSWORD, SeededUser
+
+API = "/api/v1"
+
+DEFAULT_MIX = {
+    "signup": 1,
+    "login": 2,
+    "auth_me": 6,
+    "list_moods": 6,
+    "create_mood": 3,
+}
+
+
+@dataclass(slots=True)
+class Sample:
+    scenario: str
+    started: float
+    latency: float
+    status: int | None  # None when the request never got a response
+    ok: bool
+
+
+def parse_mix(raw: str | None) -> dict[str, float]:
+    """Parse "login=2,auth_me=6" into a weight map; unknown names are an error."""
+    if not raw:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError("Workload mix has no positive weights")
+    return mix
+
+
+_signup_counter = itertools.count()
+_run_id = uuid.uuid4().hex[:8]
+
+
+async def _signup(client: httpx.AsyncClient, user: SeededUser) -> httpx.Response:
+    email = f"bench-signup-{_run_id}-{next(_signup_counter)}@example.com"
+    return await client.post(f"{API}/auth/signup", json={"email": email, "password": PASSWORD})
+
+
+async def _login(client: httpx.AsyncClient, user: SeededUser) -> httpx.Response:
+    return await client.post(f"{API}/auth/login", json={"email": user.email, "password": PASSWORD})
+
+
+async def _auth_me(client: httpx.AsyncClient, user: SeededUser) -> httpx.Response:
+    return await client.get(
+        f"{API}/auth/me", headers={"Authorization": f"Bearer {user.access_token}"}
+    )
+
+
+async def _list_moods(client: httpx.AsyncClient, user: SeededUser) -> httpx.Response:
+    return await client.get(
+        f"{API}/moods", params={"limit": 50}, headers={"Authorization": f"Bearer {user.id_token}"}
+    )
+
+
+async def _create_mood(client: httpx.AsyncClient, user: SeededUser) -> httpx.Response:
+    return await client.post(
+        f"{API}/moods",
+        json={"mood_score": 7, "energy_level": 5, "stress_level": 3},
+        headers={"Authorization": f"Bearer {user.id_token}"},
+    )
+
+
+SCENARIOS = {
+    "signup": _signup,
+    "login": _login,
+    "auth_me": _auth_me,
+    "list_moods": _list_moods,
+    "create_mood": _create_mood,
+}
+
+
+async def _worker(
+    client: httpx.AsyncClient,
+    users: list[SeededUser],
+    mix: dict[str, float],
+    rng: random.Random,
+    stop_at: float,
+    samples: list[Sample],
+) -> None:
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.perf_counter() < stop_at:
+        scenario = rng.choices(names, weights)[0]
+        user = rng.choice(users)
+        started = time.perf_counter()
+        try:
+            response = await SCENARIOS[scenario](client, user)
+            status, ok = response.status_code, response.is_success
+        except httpx.HTTPError:
+            status, ok = None, False
+        samples.append(Sample(scenario, started, time.perf_counter() - started, status, ok))
+
+
+async def run_workload(
+    base_url: str,
+    users: list[SeededUser],
+    mix: dict[str, float],
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    seed: int,
+    timeout: float = 30.0,
+) -> tuple[list[Sample], float]:
+    """
+    Run `concurrency` workers for warmup + duration seconds.
+
+    Returns the samples that started after the warm-up together with the
+    length of the measured window.
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    samples: list[Sample] = []
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        start = time.perf_counter()
+        measure_from = start + warmup
+        stop_at = measure_from + duration
+        await asyncio.gather(
+            *(
+                _worker(client, users, mix, random.Random(seed + i), stop_at, samples)
+                for i in range(concurrency)
+            )
+        )
+        # Requests still in flight at stop_at run past the window.
+        elapsed = max(time.perf_counter(), stop_at) - measure_from
+
+    return [sample for sample in samples if sample.started >= measure_from], elapsed
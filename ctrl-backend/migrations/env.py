@@ -19,7 +19,7 @@ if config.config_file_name is not None:
 # IMPORT MODELS EXPLICITLY
 # -----------------------------
 from app.database import Base
-from app.models import user, mood  # <-- IMPORTANT: import each model module
+from app.models import user, mood, idempotency, rate_limit  # <-- IMPORTANT: import each model module
 
 # Now metadata includes ALL models
 target_metadata = Base.metadata
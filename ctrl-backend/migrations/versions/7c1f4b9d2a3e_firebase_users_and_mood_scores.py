@@ -0,0 +1,42 @@
+"""firebase users and mood scores
+
+Revision ID: 7c1f4b9d2a3e
+Revises: 2e53e2a98741
+Create Date: 2026-10-17 09:12:40.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1f4b9d2a3e'
+down_revision: Union[str, Sequence[str], None] = '2e53e2a98741'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('firebase_uid', sa.String(), nullable=True))
+    op.create_index(op.f('ix_users_firebase_uid'), 'users', ['firebase_uid'], unique=True)
+    op.alter_column('users', 'email', existing_type=sa.String(), nullable=True)
+    op.alter_column('users', 'hashed_password', existing_type=sa.String(), nullable=True)
+
+    op.add_column('mood_entries', sa.Column('mood_score', sa.Integer(), nullable=True))
+    op.add_column('mood_entries', sa.Column('energy_level', sa.Integer(), nullable=True))
+    op.add_column('mood_entries', sa.Column('stress_level', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('mood_entries', 'stress_level')
+    op.drop_column('mood_entries', 'energy_level')
+    op.drop_column('mood_entries', 'mood_score')
+
+    op.alter_column('users', 'hashed_password', existing_type=sa.String(), nullable=False)
+    op.alter_column('users', 'email', existing_type=sa.String(), nullable=False)
+    op.drop_index(op.f('ix_users_firebase_uid'), table_name='users')
+    op.drop_column('users', 'firebase_uid')
@@ -0,0 +1,46 @@
+"""mood_entries user timeline index
+
+Revision ID: b4e8d0f3c921
+Revises: 7c1f4b9d2a3e
+Create Date: 2026-10-17 11:02:15.904417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e8d0f3c921'
+down_revision: Union[str, Sequence[str], None] = '7c1f4b9d2a3e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY cannot run inside a transaction, so step out of the
+    # migration's transaction for these statements.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_mood_entries_user_id_created_at',
+            'mood_entries',
+            ['user_id', sa.text('created_at DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        # id is already covered by the primary key, mood is too low
+        # cardinality to be useful, and user_id is the composite's prefix.
+        op.drop_index(op.f('ix_mood_entries_id'), table_name='mood_entries', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_mood_entries_mood'), table_name='mood_entries', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_mood_entries_user_id'), table_name='mood_entries', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_mood_entries_user_id'), 'mood_entries', ['user_id'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_mood_entries_mood'), 'mood_entries', ['mood'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_mood_entries_id'), 'mood_entries', ['id'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_mood_entries_user_id_created_at', table_name='mood_entries', postgresql_concurrently=True)
@@ -0,0 +1,31 @@
+"""user token version
+
+Revision ID: d3f9a2b7e614
+Revises: c6a1e7d42f10
+Create Date: 2026-10-17 16:02:44.108317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f9a2b7e614'
+down_revision: Union[str, Sequence[str], None] = 'c6a1e7d42f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'users',
+        sa.Column('token_version', sa.Integer(), server_default='0', nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_version')
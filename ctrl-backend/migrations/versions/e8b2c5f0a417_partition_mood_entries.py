@@ -0,0 +1,122 @@
+"""partition mood_entries by month
+
+Revision ID: e8b2c5f0a417
+Revises: d3f9a2b7e614
+Create Date: 2026-10-17 17:40:19.226051
+
+Rebuilds mood_entries as a table range-partitioned on created_at, one
+partition per UTC month plus a default partition, and copies the rows
+over. This rewrites the table under an exclusive lock, so run it in a
+maintenance window. From then on app/partition_moods.py creates upcoming
+months and expires old ones.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b2c5f0a417'
+down_revision: Union[str, Sequence[str], None] = 'd3f9a2b7e614'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "id, user_id, mood, note, mood_score, energy_level, stress_level"
+
+# Months created past the current one; MOODS_PARTITION_PREMAKE's default.
+PREMAKE_MONTHS = 3
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.rename_table('mood_entries', 'mood_entries_unpartitioned')
+    op.execute("ALTER TABLE mood_entries_unpartitioned RENAME CONSTRAINT mood_entries_pkey TO mood_entries_unpartitioned_pkey")
+    op.execute("ALTER INDEX ix_mood_entries_user_id_created_at RENAME TO ix_mood_entries_unpartitioned_user_id_created_at")
+
+    # The partition key has to be part of the primary key, and can't be NULL.
+    op.create_table('mood_entries',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('mood_entries_id_seq'::regclass)"), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('mood', sa.String(), nullable=True),
+    sa.Column('note', sa.String(), nullable=True),
+    sa.Column('mood_score', sa.Integer(), nullable=True),
+    sa.Column('energy_level', sa.Integer(), nullable=True),
+    sa.Column('stress_level', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)',
+    )
+    op.create_index(
+        'ix_mood_entries_user_id_created_at',
+        'mood_entries',
+        ['user_id', sa.text('created_at DESC')],
+        unique=False,
+    )
+    op.execute("CREATE TABLE mood_entries_default PARTITION OF mood_entries DEFAULT")
+    # A partition for every month that has entries (not the whole span, so
+    # one far-off device clock doesn't create hundreds of empty tables),
+    # plus the current month and PREMAKE_MONTHS ahead.
+    op.execute(f"""
+        DO $$
+        DECLARE
+            month date;
+        BEGIN
+            FOR month IN
+                SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC')::date
+                FROM mood_entries_unpartitioned WHERE created_at IS NOT NULL
+                UNION
+                SELECT generate_series(
+                    date_trunc('month', now() AT TIME ZONE 'UTC'),
+                    date_trunc('month', now() AT TIME ZONE 'UTC') + interval '{PREMAKE_MONTHS} months',
+                    interval '1 month'
+                )::date
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF mood_entries FOR VALUES FROM (%L) TO (%L)',
+                    'mood_entries_p' || to_char(month, 'YYYYMM'),
+                    month::timestamp AT TIME ZONE 'UTC',
+                    (month + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+                );
+            END LOOP;
+        END $$
+    """)
+
+    op.execute(
+        f"INSERT INTO mood_entries ({COLUMNS}, created_at)"
+        f" SELECT {COLUMNS}, coalesce(created_at, now()) FROM mood_entries_unpartitioned"
+    )
+    op.execute("ALTER SEQUENCE mood_entries_id_seq OWNED BY mood_entries.id")
+    op.drop_table('mood_entries_unpartitioned')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Partitions already detached by app/partition_moods.py are not copied back.
+    op.rename_table('mood_entries', 'mood_entries_partitioned')
+    op.execute("ALTER TABLE mood_entries_partitioned RENAME CONSTRAINT mood_entries_pkey TO mood_entries_partitioned_pkey")
+    op.execute("ALTER INDEX ix_mood_entries_user_id_created_at RENAME TO ix_mood_entries_partitioned_user_id_created_at")
+
+    op.create_table('mood_entries',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('mood_entries_id_seq'::regclass)"), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('mood', sa.String(), nullable=True),
+    sa.Column('note', sa.String(), nullable=True),
+    sa.Column('mood_score', sa.Integer(), nullable=True),
+    sa.Column('energy_level', sa.Integer(), nullable=True),
+    sa.Column('stress_level', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    )
+    op.execute(
+        f"INSERT INTO mood_entries ({COLUMNS}, created_at)"
+        f" SELECT {COLUMNS}, created_at FROM mood_entries_partitioned"
+    )
+    op.create_index(
+        'ix_mood_entries_user_id_created_at',
+        'mood_entries',
+        ['user_id', sa.text('created_at DESC')],
+        unique=False,
+    )
+    op.execute("ALTER SEQUENCE mood_entries_id_seq OWNED BY mood_entries.id")
+    op.drop_table('mood_entries_partitioned')
@@ -1,3 +1,5 @@
+import time
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -6,9 +8,14 @@ from sqlalchemy.pool import StaticPool
 
 # Import after conftest.py sets environment variables
 from app.main import app
+from app.core.config import settings
 from app.database import Base, get_db
 from app.models.user import User
-from app.services.security import hash_password
+from app.services.principal_cache import principal_cache
+from app.services.idempotency import idempotency_store
+from app.services.rate_limit import rate_limiter
+from app.services.security import create_access_token, hash_password
+from app.services.token_versions import token_versions
 
 
 # Use the test database URL from environment (set in conftest.py)
@@ -54,6 +61,10 @@ def client(db_session):
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    rate_limiter.clear()
+    idempotency_store.clear()
+    principal_cache.clear()
+    token_versions.clear()
     yield TestClient(app)
     app.dependency_overrides.clear()
 
@@ -125,6 +136,129 @@ class TestSignup:
         assert response.status_code == 422  # Validation error
 
 
+class TestPasswordRehash:
+    """Test cases for rehash-on-login when the bcrypt cost changes."""
+
+    def test_login_rehashes_at_current_cost(self, client, db_session, monkeypatch):
+        """Test a hash stored at an old cost is upgraded after login."""
+        from app.services import security
+        user = User(email="old@example.com", hashed_password=hash_password("testpassword123", rounds=4))
+        db_session.add(user)
+        db_session.commit()
+        monkeypatch.setattr(security, "_bcrypt_rounds", 5)
+
+        response = client.post(
+            "/api/v1/auth/login",
+            json={"email": "old@example.com", "password": "testpassword123"}
+        )
+        assert response.status_code == 200
+
+        db_session.expire_all()
+        stored = db_session.get(User, user.id).hashed_password
+        assert security.hash_rounds(stored) == 5
+        assert security.verify_password("testpassword123", stored)
+
+    def test_failed_login_does_not_rehash(self, client, db_session, monkeypatch):
+        """Test only a verified password is ever rehashed."""
+        from app.services import security
+        old_hash = hash_password("testpassword123", rounds=4)
+        db_session.add(User(email="old@example.com", hashed_password=old_hash))
+        db_session.commit()
+        monkeypatch.setattr(security, "_bcrypt_rounds", 5)
+
+        response = client.post(
+            "/api/v1/auth/login",
+            json={"email": "old@example.com", "password": "wrongpassword"}
+        )
+        assert response.status_code == 401
+
+        db_session.expire_all()
+        assert db_session.query(User).one().hashed_password == old_hash
+
+
+class TestSignupInsert:
+    """Test cases for the single-statement signup insert."""
+
+    def test_duplicate_email_skips_hashing(self, client, test_user, monkeypatch):
+        """Test an existing email is rejected before any bcrypt work."""
+        from app.core.config import settings
+        # With no hashing capacity, reaching bcrypt would answer 503.
+        monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 0)
+        monkeypatch.setattr(settings, "PASSWORD_HASH_QUEUE_SIZE", 0)
+
+        response = client.post(
+            "/api/v1/auth/signup",
+            json={"email": "test@example.com", "password": "securepassword123"}
+        )
+        assert response.status_code == 400
+
+    def test_concurrent_signup_loses_cleanly(self, client, db_session, monkeypatch):
+        """Test losing the race after the probe is a 400, not a unique-index 500."""
+        from app.routers import auth as auth_router
+
+        async def hash_while_someone_else_signs_up(password):
+            db_session.add(User(email="race@example.com", hashed_password="x"))
+            db_session.commit()
+            return "hashed"
+
+        monkeypatch.setattr(auth_router, "hash_password_async", hash_while_someone_else_signs_up)
+        response = client.post(
+            "/api/v1/auth/signup",
+            json={"email": "race@example.com", "password": "securepassword123"}
+        )
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Email already registered"
+
+    def test_postgres_statement(self):
+        """Test the Postgres form is one INSERT ... ON CONFLICT DO NOTHING RETURNING."""
+        from types import SimpleNamespace
+        from sqlalchemy.dialects import postgresql
+        from app.routers.auth import _insert_user_ignoring_duplicate
+
+        db = SimpleNamespace(bind=SimpleNamespace(dialect=postgresql.dialect()))
+        statement = _insert_user_ignoring_duplicate(db, {"email": "a@example.com", "hashed_password": "x"})
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT (email) DO NOTHING" in sql
+        assert sql.rstrip().endswith("RETURNING users.id, users.created_at")
+
+
+class TestSignupIdempotency:
+    """Test cases for Idempotency-Key on POST /auth/signup."""
+
+    def test_retry_replays_signup(self, client, db_session):
+        """Test a retried signup returns the same user instead of 400."""
+        body = {"email": "retry@example.com", "password": "securepassword123"}
+        headers = {"Idempotency-Key": "signup-1"}
+
+        first = client.post("/api/v1/auth/signup", json=body, headers=headers)
+        second = client.post("/api/v1/auth/signup", json=body, headers=headers)
+
+        assert first.status_code == second.status_code == 200
+        assert first.json() == second.json()
+        assert second.headers["idempotent-replayed"] == "true"
+        assert db_session.query(User).filter(User.email == "retry@example.com").count() == 1
+
+    def test_replay_skips_hashing(self, client, monkeypatch):
+        """Test the replay does no bcrypt work."""
+        body = {"email": "retry@example.com", "password": "securepassword123"}
+        headers = {"Idempotency-Key": "signup-1"}
+        assert client.post("/api/v1/auth/signup", json=body, headers=headers).status_code == 200
+
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 0)
+        monkeypatch.setattr(settings, "PASSWORD_HASH_QUEUE_SIZE", 0)
+        assert client.post("/api/v1/auth/signup", json=body, headers=headers).status_code == 200
+
+    def test_overlong_key_rejected(self, client):
+        """Test keys longer than 255 characters are refused."""
+        response = client.post(
+            "/api/v1/auth/signup",
+            json={"email": "retry@example.com", "password": "securepassword123"},
+            headers={"Idempotency-Key": "x" * 256},
+        )
+        assert response.status_code == 400
+
+
 class TestLogin:
     """Test cases for /auth/login endpoint."""
 
@@ -241,3 +375,294 @@ class TestMe:
         # Should fail because user_id won't match
         assert response.status_code == 401
 
+
+
+class TestMeConditional:
+    """Test cases for ETag / If-None-Match on /auth/me."""
+
+    def test_me_not_modified(self, client, test_user):
+        """Test a matching If-None-Match returns 304 with no body."""
+        login_response = client.post(
+            "/api/v1/auth/login",
+            json={
+                "email": "test@example.com",
+                "password": "testpassword123"
+            }
+        )
+        headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+        first = client.get("/api/v1/auth/me", headers=headers)
+        etag = first.headers["etag"]
+
+        second = client.get("/api/v1/auth/me", headers={**headers, "If-None-Match": etag})
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["etag"] == etag
+
+
+class TestPrincipalCache:
+    """Test cases for the cached principal behind get_current_user."""
+
+    def _token(self, client):
+        response = client.post(
+            "/api/v1/auth/login",
+            json={
+                "email": "test@example.com",
+                "password": "testpassword123"
+            }
+        )
+        return response.json()["access_token"]
+
+    def test_me_served_from_cache(self, client, test_user):
+        """Test repeated /me calls hit the cache instead of the DB."""
+        headers = {"Authorization": f"Bearer {self._token(client)}"}
+
+        client.get("/api/v1/auth/me", headers=headers)
+        response = client.get("/api/v1/auth/me", headers=headers)
+
+        assert response.status_code == 200
+        assert response.json()["email"] == "test@example.com"
+        stats = principal_cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_cache_invalidated_on_update(self, client, db_session, test_user):
+        """Test updating the user drops the cached snapshot."""
+        headers = {"Authorization": f"Bearer {self._token(client)}"}
+        client.get("/api/v1/auth/me", headers=headers)
+
+        test_user.email = "renamed@example.com"
+        db_session.commit()
+
+        response = client.get("/api/v1/auth/me", headers=headers)
+        assert response.json()["email"] == "renamed@example.com"
+
+    def test_cache_invalidated_on_delete(self, client, db_session, test_user):
+        """Test deleting the user makes the token stop working."""
+        headers = {"Authorization": f"Bearer {self._token(client)}"}
+        client.get("/api/v1/auth/me", headers=headers)
+
+        db_session.delete(test_user)
+        db_session.commit()
+
+        response = client.get("/api/v1/auth/me", headers=headers)
+        assert response.status_code == 401
+
+
+class TestRevoke:
+    """Test cases for POST /auth/revoke."""
+
+    def _token(self, client):
+        response = client.post(
+            "/api/v1/auth/login",
+            json={"email": "test@example.com", "password": "testpassword123"},
+        )
+        return response.json()["access_token"]
+
+    def test_revoke_invalidates_old_tokens(self, client, test_user):
+        """Test tokens issued before a revoke stop working, new ones don't."""
+        headers = {"Authorization": f"Bearer {self._token(client)}"}
+        client.get("/api/v1/auth/me", headers=headers)
+
+        response = client.post("/api/v1/auth/revoke", headers=headers)
+        assert response.status_code == 204
+
+        response = client.get("/api/v1/auth/me", headers=headers)
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Token revoked"
+
+        fresh = {"Authorization": f"Bearer {self._token(client)}"}
+        assert client.get("/api/v1/auth/me", headers=fresh).status_code == 200
+
+    def test_refresh_keeps_concurrent_revoke(self, client, test_user):
+        """Test a reload that missed a revoke doesn't forget the recorded version."""
+        import asyncio
+        # Recorded by revoke_tokens while the SELECT still saw version 0.
+        token_versions.record(test_user.id, 1)
+
+        asyncio.run(token_versions.refresh())
+
+        assert token_versions.current(test_user.id) == 1
+
+    def test_revoke_requires_auth(self, client):
+        """Test revoke without a token is rejected."""
+        response = client.post("/api/v1/auth/revoke")
+        assert response.status_code == 401
+
+
+class TestStatelessPrincipal:
+    """Test cases for building the principal from token claims."""
+
+    @pytest.fixture(autouse=True)
+    def stateless(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "STATELESS_PRINCIPAL", True)
+        # Stands in for the load prewarm does at startup.
+        monkeypatch.setattr(token_versions, "loaded_at", time.monotonic())
+
+    def _token(self, client):
+        response = client.post(
+            "/api/v1/auth/login",
+            json={"email": "test@example.com", "password": "testpassword123"},
+        )
+        return response.json()["access_token"]
+
+    def _no_db(self, monkeypatch):
+        async def fail(*args):
+            raise AssertionError("principal should come from the token")
+
+        monkeypatch.setattr("app.dependencies._get_user_by_id", fail)
+
+    def test_me_without_db_lookup(self, client, test_user, monkeypatch):
+        """Test /me is answered from the token's claims alone."""
+        headers = {"Authorization": f"Bearer {self._token(client)}"}
+        self._no_db(monkeypatch)
+
+        response = client.get("/api/v1/auth/me", headers=headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["id"] == test_user.id
+        assert data["email"] == "test@example.com"
+        assert data["created_at"] is not None
+
+    def test_revoked_token_rejected(self, client, test_user, monkeypatch):
+        """Test a revoke is honoured without consulting the DB."""
+        headers = {"Authorization": f"Bearer {self._token(client)}"}
+        client.post("/api/v1/auth/revoke", headers=headers)
+        self._no_db(monkeypatch)
+
+        response = client.get("/api/v1/auth/me", headers=headers)
+
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Token revoked"
+
+    def test_stale_versions_fall_back_to_db(self, client, test_user, monkeypatch):
+        """Test the DB is consulted while the version map is stale."""
+        headers = {"Authorization": f"Bearer {self._token(client)}"}
+        monkeypatch.setattr(token_versions, "loaded_at", 0.0)
+
+        response = client.get("/api/v1/auth/me", headers=headers)
+
+        assert response.status_code == 200
+        assert principal_cache.stats()["misses"] == 1
+
+    def test_token_without_claims_falls_back_to_db(self, client, test_user):
+        """Test tokens issued before the claims existed keep working."""
+        token = create_access_token(data={"sub": str(test_user.id)})
+
+        response = client.get(
+            "/api/v1/auth/me", headers={"Authorization": f"Bearer {token}"}
+        )
+
+        assert response.status_code == 200
+        assert response.json()["email"] == "test@example.com"
+
+
+class TestHashingBackpressure:
+    """Test cases for the bounded password hashing pool."""
+
+    def test_login_returns_503_when_hash_queue_full(self, client, test_user, monkeypatch):
+        """Test login is shed with 503 + Retry-After once the queue is full."""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 0)
+        monkeypatch.setattr(settings, "PASSWORD_HASH_QUEUE_SIZE", 0)
+
+        response = client.post(
+            "/api/v1/auth/login",
+            json={
+                "email": "test@example.com",
+                "password": "testpassword123"
+            }
+        )
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == str(settings.PASSWORD_HASH_RETRY_AFTER)
+
+    def test_signup_returns_503_when_hash_queue_full(self, client, monkeypatch):
+        """Test signup is shed with 503 before anything is written."""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 0)
+        monkeypatch.setattr(settings, "PASSWORD_HASH_QUEUE_SIZE", 0)
+
+        response = client.post(
+            "/api/v1/auth/signup",
+            json={
+                "email": "busy@example.com",
+                "password": "securepassword123"
+            }
+        )
+        assert response.status_code == 503
+        assert "retry-after" in response.headers
+
+
+class TestRateLimit:
+    """Test cases for the auth route rate limits."""
+
+    def test_login_throttled_per_ip(self, client, test_user, monkeypatch):
+        """Test the IP limit returns 429 with Retry-After once spent."""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "RATE_LIMIT_LOGIN_IP", "2/minute")
+
+        body = {"email": "test@example.com", "password": "wrongpassword"}
+        assert client.post("/api/v1/auth/login", json=body).status_code == 401
+        assert client.post("/api/v1/auth/login", json=body).status_code == 401
+
+        response = client.post("/api/v1/auth/login", json=body)
+        assert response.status_code == 429
+        assert 0 < int(response.headers["retry-after"]) <= 30
+
+    def test_login_throttled_per_account(self, client, test_user, monkeypatch):
+        """Test the account limit applies per IP, whatever the email's case."""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "RATE_LIMIT_LOGIN_ACCOUNT", "1/minute")
+
+        assert client.post(
+            "/api/v1/auth/login",
+            json={"email": "test@example.com", "password": "wrongpassword"}
+        ).status_code == 401
+        assert client.post(
+            "/api/v1/auth/login",
+            json={"email": "TEST@example.com", "password": "testpassword123"}
+        ).status_code == 429
+        assert client.post(
+            "/api/v1/auth/login",
+            json={"email": "other@example.com", "password": "wrongpassword"}
+        ).status_code == 401
+
+    def test_account_not_locked_from_other_ip(self, client, test_user, monkeypatch):
+        """Test failures from one IP don't lock the owner out elsewhere."""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "RATE_LIMIT_LOGIN_ACCOUNT", "1/minute")
+        body = {"email": "test@example.com", "password": "wrongpassword"}
+
+        attacker = TestClient(app, client=("203.0.113.7", 50000))
+        assert attacker.post("/api/v1/auth/login", json=body).status_code == 401
+        assert attacker.post("/api/v1/auth/login", json=body).status_code == 429
+
+        owner = client.post(
+            "/api/v1/auth/login",
+            json={"email": "test@example.com", "password": "testpassword123"}
+        )
+        assert owner.status_code == 200
+
+    def test_throttled_before_hashing(self, client, monkeypatch):
+        """Test a throttled signup never reaches the bcrypt pool."""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "RATE_LIMIT_SIGNUP_IP", "1/hour")
+        body = {"email": "new@example.com", "password": "securepassword123"}
+        assert client.post("/api/v1/auth/signup", json=body).status_code == 200
+
+        # With no hashing capacity, reaching bcrypt would answer 503.
+        monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 0)
+        monkeypatch.setattr(settings, "PASSWORD_HASH_QUEUE_SIZE", 0)
+        body["email"] = "another@example.com"
+        assert client.post("/api/v1/auth/signup", json=body).status_code == 429
+
+    def test_disabled(self, client, test_user, monkeypatch):
+        """Test RATE_LIMIT_ENABLED=false turns every limit off."""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+        monkeypatch.setattr(settings, "RATE_LIMIT_LOGIN_IP", "1/minute")
+
+        body = {"email": "test@example.com", "password": "wrongpassword"}
+        for _ in range(3):
+            assert client.post("/api/v1/auth/login", json=body).status_code == 401
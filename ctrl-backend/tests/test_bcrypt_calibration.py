@@ -0,0 +1,58 @@
+import pytest
+from fastapi.testclient import TestClient
+
+# Import after conftest.py sets environment variables
+from app.core.config import settings
+from app.main import app
+from app.services import security
+from app.services.security import (
+    calibrate_bcrypt_rounds,
+    hash_password,
+    hash_rounds,
+    needs_rehash,
+    verify_password,
+)
+
+
+class TestBcryptCost:
+    """Test cases for the bcrypt work factor and its calibration."""
+
+    def test_cost_recorded_in_hash(self):
+        """Test the chosen rounds end up in the stored hash."""
+        hashed = hash_password("secret", rounds=4)
+        assert hash_rounds(hashed) == 4
+        assert verify_password("secret", hashed)
+
+    def test_needs_rehash(self, monkeypatch):
+        """Test hashes at any other cost are flagged for rehash."""
+        monkeypatch.setattr(security, "_bcrypt_rounds", 5)
+        assert needs_rehash(hash_password("secret", rounds=4))
+        assert not needs_rehash(hash_password("secret", rounds=5))
+
+    def test_calibration_picks_highest_cost_within_target(self, monkeypatch):
+        """Test calibration stops at the last cost under the target."""
+        # 10 rounds = 25ms, doubling per round: 11 = 50ms, 12 = 100ms, 13 = 200ms
+        monkeypatch.setattr(security, "_time_hash", lambda rounds: 25.0 * 2 ** (rounds - 10))
+
+        rounds, timings = calibrate_bcrypt_rounds(target_ms=100, min_rounds=10, max_rounds=16)
+        assert rounds == 12
+        assert list(timings) == [10, 11, 12, 13]
+
+    @pytest.mark.parametrize("target_ms, expected", [(1, 10), (10_000, 14)])
+    def test_calibration_respects_bounds(self, monkeypatch, target_ms, expected):
+        """Test slow CPUs still get min_rounds and fast ones stop at max_rounds."""
+        monkeypatch.setattr(security, "_time_hash", lambda rounds: 25.0 * 2 ** (rounds - 10))
+
+        rounds, _ = calibrate_bcrypt_rounds(target_ms=target_ms, min_rounds=10, max_rounds=14)
+        assert rounds == expected
+
+    def test_calibrated_at_startup_without_prewarm(self, monkeypatch):
+        """Test BCRYPT_CALIBRATE applies even with PREWARM_ENABLED=false."""
+        monkeypatch.setattr(settings, "PREWARM_ENABLED", False)
+        monkeypatch.setattr(settings, "BCRYPT_CALIBRATE", True)
+        monkeypatch.setattr(settings, "BCRYPT_TARGET_MS", 50)
+        monkeypatch.setattr(security, "_bcrypt_rounds", settings.BCRYPT_ROUNDS)
+        monkeypatch.setattr(security, "_time_hash", lambda rounds: 25.0 * 2 ** (rounds - 10))
+
+        with TestClient(app):
+            assert security.bcrypt_rounds() == 11
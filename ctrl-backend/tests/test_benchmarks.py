@@ -0,0 +1,100 @@
+import random
+
+import pytest
+
+from app.database import Base, SessionLocal, engine
+from app.models.user import User
+from benchmarks import environment
+from benchmarks.report import compare, percentile, summarize
+from benchmarks.workload import Sample, parse_mix
+
+
+def _report(p95, rps, error_rate=0.0):
+    return {
+        "generated_at": "2026-01-01T00:00:00+00:00",
+        "endpoints": {
+            "login": {"latency_ms": {"p95": p95}, "rps": rps, "error_rate": error_rate},
+        },
+    }
+
+
+class TestBenchmarkReport:
+    """Test cases for the benchmark harness report helpers."""
+
+    def test_percentile_nearest_rank(self):
+        """Test nearest-rank percentiles over a sorted list."""
+        values = [float(v) for v in range(1, 101)]
+        assert percentile(values, 50) == 50.0
+        assert percentile(values, 95) == 95.0
+        assert percentile(values, 99) == 99.0
+        assert percentile([], 95) == 0.0
+
+    def test_summarize_groups_by_scenario(self):
+        """Test per-endpoint counts, error rates and status breakdown."""
+        samples = [
+            Sample("login", 0.0, 0.010, 200, True),
+            Sample("login", 0.0, 0.020, 503, False),
+            Sample("auth_me", 0.0, 0.005, None, False),
+        ]
+        report = summarize(samples, elapsed=2.0, config={})
+
+        assert report["overall"]["requests"] == 3
+        assert report["endpoints"]["login"]["error_rate"] == 0.5
+        assert report["endpoints"]["login"]["status_codes"] == {"200": 1, "503": 1}
+        assert report["endpoints"]["auth_me"]["status_codes"] == {"error": 1}
+        assert report["endpoints"]["login"]["rps"] == 1.0
+
+    def test_compare_flags_regressions_beyond_tolerance(self):
+        """Test slower p95, lower rps and more errors are reported."""
+        result = compare(_report(p95=150, rps=40, error_rate=0.05), _report(p95=100, rps=50), 0.10)
+        assert len(result["regressions"]) == 3
+        assert result["endpoints"]["login"]["p95_change"] == 0.5
+
+    def test_compare_within_tolerance(self):
+        """Test small drift is not treated as a regression."""
+        result = compare(_report(p95=105, rps=48), _report(p95=100, rps=50), 0.10)
+        assert result["regressions"] == []
+
+    def test_parse_mix_rejects_unknown_scenario(self):
+        """Test a typo in --mix fails loudly instead of being ignored."""
+        assert parse_mix("login=2,auth_me=1") == {"login": 2.0, "auth_me": 1.0}
+        with pytest.raises(ValueError):
+            parse_mix("logn=2")
+
+
+class TestSeedGuard:
+    """Test cases for protecting existing data from the seeder."""
+
+    @pytest.fixture
+    def tables(self):
+        Base.metadata.create_all(bind=engine)
+        yield
+        Base.metadata.drop_all(bind=engine)
+
+    def test_refuses_populated_database(self, tables):
+        """Test seeding a database that holds rows fails without --reset."""
+        db = SessionLocal()
+        db.add(User(email="real@example.com", hashed_password="x"))
+        db.commit()
+
+        with pytest.raises(RuntimeError, match="--reset"):
+            environment.seed(1, 1, "unused", random.Random(1))
+
+        assert db.query(User).filter_by(email="real@example.com").count() == 1
+        db.close()
+
+    def test_empty_tables_are_not_data(self, tables):
+        """Test freshly created, empty tables don't block seeding."""
+        assert environment.tables_with_rows(engine) == []
+
+
+class TestColdStartBudget:
+    """Test cases for the cold-start budget check."""
+
+    def test_over_budget_is_reported(self):
+        """Test each exceeded budget produces a message."""
+        from benchmarks.cold_start import check_budget
+
+        report = {"import": {"total_ms": 900.0}, "first_request_ms": {"median": 3000.0}}
+        over = check_budget(report, {"import_ms": 1000, "first_request_ms": 2000})
+        assert over == ["first request 3000.0ms > 2000ms"]
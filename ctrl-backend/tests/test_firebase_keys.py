@@ -0,0 +1,96 @@
+import json
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+# Import after conftest.py sets environment variables
+from app.services.firebase_keys import FirebaseKeyStore
+
+
+PROJECT_ID = "ctrl-test-project"
+
+
+@pytest.fixture(scope="module")
+def private_pem():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+@pytest.fixture
+def jwks_file(tmp_path, private_pem):
+    """Write a stand-in JWKS document holding the test public key."""
+    public = jwk.construct(private_pem, "RS256").public_key().to_dict()
+    public["kid"] = "test-kid"
+    path = tmp_path / "jwks.json"
+    path.write_text(json.dumps({"keys": [public]}))
+    return path
+
+
+def _id_token(private_pem, kid="test-kid", **overrides):
+    now = int(time.time())
+    claims = {
+        "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+        "aud": PROJECT_ID,
+        "sub": "test-firebase-uid-123",
+        "iat": now,
+        "auth_time": now,
+        "exp": now + 3600,
+    }
+    claims.update(overrides)
+    return jwt.encode(claims, private_pem, algorithm="RS256", headers={"kid": kid})
+
+
+class TestFirebaseKeyStore:
+    """Test cases for local ID token verification."""
+
+    def test_verify_valid_token(self, jwks_file, private_pem, tmp_path):
+        """Test a token signed by a cached key verifies offline."""
+        store = FirebaseKeyStore(PROJECT_ID, source=str(jwks_file), cache_path=tmp_path / "cache.json")
+        store.load()
+
+        claims = store.verify_id_token(_id_token(private_pem))
+        assert claims["uid"] == "test-firebase-uid-123"
+
+    def test_reject_wrong_audience(self, jwks_file, private_pem):
+        """Test a token for another project is rejected."""
+        store = FirebaseKeyStore(PROJECT_ID, source=str(jwks_file))
+        store.load()
+
+        with pytest.raises(Exception):
+            store.verify_id_token(_id_token(private_pem, aud="other-project"))
+
+    def test_reject_unknown_kid(self, jwks_file, private_pem):
+        """Test a token signed with an unknown key id is rejected."""
+        store = FirebaseKeyStore(PROJECT_ID, source=str(jwks_file))
+        store.load()
+
+        with pytest.raises(ValueError):
+            store.verify_id_token(_id_token(private_pem, kid="rotated-kid"))
+
+    def test_cold_start_from_persisted_copy(self, jwks_file, private_pem, tmp_path):
+        """Test keys persisted by one store load without the source."""
+        cache_path = tmp_path / "cache.json"
+        FirebaseKeyStore(PROJECT_ID, source=str(jwks_file), cache_path=cache_path).load()
+        jwks_file.unlink()
+
+        store = FirebaseKeyStore(PROJECT_ID, source=str(jwks_file), cache_path=cache_path)
+        store.load()
+        assert store.ready
+        assert store.verify_id_token(_id_token(private_pem))["uid"] == "test-firebase-uid-123"
+
+    def test_background_refresh_thread(self, jwks_file, tmp_path):
+        """Test start() loads keys and stop() joins the refresher."""
+        store = FirebaseKeyStore(PROJECT_ID, source=str(jwks_file), cache_path=tmp_path / "cache.json")
+        store.start()
+        try:
+            assert store.ready
+            assert store.expires_at > time.time()
+        finally:
+            store.stop()
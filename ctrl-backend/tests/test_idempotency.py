@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+# Import after conftest.py sets environment variables
+from app.core.config import settings
+from app.database import Base, engine
+from app.services.idempotency import IdempotencyStore
+
+
+@pytest.fixture
+def tables():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+def _counting_handler(calls, delay=0.05):
+    async def handler():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return {"id": str(len(calls))}
+    return handler
+
+
+class TestIdempotencyStore:
+    """Test cases for Idempotency-Key replay."""
+
+    def test_concurrent_duplicates_run_once(self):
+        """Test a duplicate arriving mid-request waits and gets the same body."""
+        store = IdempotencyStore(max_size=100, ttl=60)
+        calls = []
+
+        async def main():
+            handler = _counting_handler(calls)
+            return await asyncio.gather(
+                store.run("k", "fp", handler), store.run("k", "fp", handler)
+            )
+
+        first, second = asyncio.run(main())
+        assert calls == [1]
+        assert first.body == second.body
+        assert "idempotent-replayed" not in first.headers
+        assert second.headers["idempotent-replayed"] == "true"
+
+    def test_different_request_same_key_rejected(self):
+        """Test reusing a key for a different payload is a 422."""
+        store = IdempotencyStore(max_size=100, ttl=60)
+
+        async def main():
+            await store.run("k", "fp-1", _counting_handler([], delay=0))
+            await store.run("k", "fp-2", _counting_handler([], delay=0))
+
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(main())
+        assert exc.value.status_code == 422
+
+    def test_failure_is_not_stored(self):
+        """Test a failed first attempt lets the retry run the handler."""
+        store = IdempotencyStore(max_size=100, ttl=60)
+        calls = []
+
+        async def failing():
+            calls.append(1)
+            raise HTTPException(status_code=503)
+
+        async def main():
+            with pytest.raises(HTTPException):
+                await store.run("k", "fp", failing)
+            return await store.run("k", "fp", _counting_handler(calls, delay=0))
+
+        response = asyncio.run(main())
+        assert response.status_code == 200
+        assert len(calls) == 2
+
+    def test_shared_table_across_workers(self, tables, monkeypatch):
+        """Test two stores (as two workers) coordinate through the DB claim row."""
+        monkeypatch.setattr(settings, "IDEMPOTENCY_DB", True)
+        worker_a = IdempotencyStore(max_size=100, ttl=60)
+        worker_b = IdempotencyStore(max_size=100, ttl=60)
+        calls = []
+
+        async def main():
+            handler = _counting_handler(calls, delay=0.2)
+            first = asyncio.create_task(worker_a.run("k", "fp", handler))
+            await asyncio.sleep(0.05)
+            second = await worker_b.run("k", "fp", handler)
+            return await first, second
+
+        first, second = asyncio.run(main())
+        assert calls == [1]
+        assert second.body == first.body
+        assert second.headers["idempotent-replayed"] == "true"
+
+    def test_abandoned_claim_taken_over(self, tables, monkeypatch):
+        """Test a claim never completed (worker died) is taken over after its lease."""
+        monkeypatch.setattr(settings, "IDEMPOTENCY_DB", True)
+        monkeypatch.setattr(settings, "IDEMPOTENCY_CLAIM_LEASE", 0.2)
+        monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_TIMEOUT", 5)
+        dead_worker = IdempotencyStore(max_size=100, ttl=60)
+        retry_worker = IdempotencyStore(max_size=100, ttl=60)
+        calls = []
+
+        async def main():
+            # Claim and never complete, as if the process was killed.
+            assert await dead_worker._claim("k", "fp") is None
+            return await retry_worker.run("k", "fp", _counting_handler(calls, delay=0))
+
+        response = asyncio.run(main())
+        assert calls == [1]
+        assert response.status_code == 200
+        assert "idempotent-replayed" not in response.headers
+
+    def test_slow_handler_keeps_its_claim(self, tables, monkeypatch):
+        """Test a handler outliving the lease renews its claim instead of being run twice."""
+        monkeypatch.setattr(settings, "IDEMPOTENCY_DB", True)
+        monkeypatch.setattr(settings, "IDEMPOTENCY_CLAIM_LEASE", 0.3)
+        monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_TIMEOUT", 5)
+        worker_a = IdempotencyStore(max_size=100, ttl=60)
+        worker_b = IdempotencyStore(max_size=100, ttl=60)
+        calls = []
+
+        async def main():
+            handler = _counting_handler(calls, delay=1.0)
+            first = asyncio.create_task(worker_a.run("k", "fp", handler))
+            # Well past the original lease, while the handler is still running.
+            await asyncio.sleep(0.6)
+            second = await worker_b.run("k", "fp", handler)
+            return await first, second
+
+        first, second = asyncio.run(main())
+        assert calls == [1]
+        assert second.body == first.body
+        assert second.headers["idempotent-replayed"] == "true"
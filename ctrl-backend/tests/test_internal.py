@@ -0,0 +1,97 @@
+import pytest
+from fastapi.testclient import TestClient
+
+# Import after conftest.py sets environment variables
+from app.main import app
+from app.core.config import settings
+from app.database import Base, engine
+
+
+INTERNAL_TOKEN = "test-internal-token"
+
+client = TestClient(app, headers={"X-Internal-Token": INTERNAL_TOKEN})
+
+
+@pytest.fixture(autouse=True)
+def internal_token(monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", INTERNAL_TOKEN)
+
+
+@pytest.fixture
+def tables():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+class TestPoolStats:
+    """Test cases for GET /internal/db/pool."""
+
+    def test_pool_stats_after_checkout(self, tables):
+        """Test a request through the async engine shows up in the stats."""
+        client.post(
+            "/api/v1/auth/login",
+            json={"email": "nobody@example.com", "password": "password123"}
+        )
+
+        response = client.get("/internal/db/pool")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["async"]["checkouts"] >= 1
+        assert data["async"]["wait_seconds"]["count"] >= 1
+        assert data["async"]["pool"]["size"] == settings.DB_POOL_SIZE
+        assert data["async"]["pool"]["checked_out"] == 0
+
+    def test_closed_without_configured_token(self, monkeypatch):
+        """Test /internal and /metrics are not served while no token is configured."""
+        monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", None)
+
+        assert client.get("/internal/db/pool").status_code == 404
+        assert client.get("/metrics").status_code == 404
+
+    def test_internal_token_required_when_configured(self, monkeypatch):
+        """Test /internal is closed once INTERNAL_API_TOKEN is set."""
+        monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", "s3cret")
+
+        assert client.get("/internal/db/pool").status_code == 403
+        response = client.get("/internal/db/pool", headers={"X-Internal-Token": "s3cret"})
+        assert response.status_code == 200
+
+
+class TestMetrics:
+    """Test cases for GET /metrics."""
+
+    def test_request_latency_recorded_per_route(self):
+        """Test requests appear under their route template and status."""
+        client.get("/api/v1/health")
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        body = response.text
+        assert (
+            'http_request_duration_seconds_count{method="GET",route="/api/v1/health",status="200"}'
+            in body
+        )
+        assert 'http_response_size_bytes_bucket{method="GET",route="/api/v1/health",le="+Inf"}' in body
+        assert "http_requests_in_flight 1" in body
+        assert 'db_pool_checkouts_total{engine="async"}' in body
+        assert 'cache_hits_total{cache="principal"}' in body
+        assert "log_records_dropped_total" in body
+
+    def test_unmatched_paths_share_a_label(self):
+        """Test 404s for arbitrary paths don't create a series per path."""
+        client.get("/no/such/path-1")
+        client.get("/no/such/path-2")
+
+        body = client.get("/metrics").text
+        assert 'route="<unmatched>",status="404"' in body
+        assert "path-1" not in body
+
+    def test_metrics_token_required_when_configured(self, monkeypatch):
+        """Test /metrics is closed once INTERNAL_API_TOKEN is set."""
+        monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", "s3cret")
+
+        assert client.get("/metrics").status_code == 403
+        response = client.get("/metrics", headers={"X-Internal-Token": "s3cret"})
+        assert response.status_code == 200
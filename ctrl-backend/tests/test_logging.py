@@ -0,0 +1,77 @@
+import json
+import logging
+import queue
+
+from fastapi.testclient import TestClient
+
+# Import after conftest.py sets environment variables
+from app.main import app
+from app.routers.moods import router as moods_router
+from app.utils import logging as app_logging
+from app.utils.logging import BoundedQueueHandler, JsonFormatter, log_api_call
+
+
+client = TestClient(app)
+
+
+def _record(msg="api_call", **extra):
+    record = logging.LogRecord("ctrl-backend", logging.INFO, __file__, 1, msg, None, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+class TestJsonLogging:
+    """Test cases for the queue-based JSON logging pipeline."""
+
+    def test_formatter_emits_single_line_json(self):
+        """Test extra fields and request context end up in one JSON line."""
+        record = _record(path="/moods", user_id="42", latency_ms=3.5)
+        record.log_context = {"request_id": "abc123"}
+
+        line = JsonFormatter().format(record)
+
+        assert "\n" not in line
+        payload = json.loads(line)
+        assert payload["msg"] == "api_call"
+        assert payload["path"] == "/moods"
+        assert payload["user_id"] == "42"
+        assert payload["latency_ms"] == 3.5
+        assert payload["request_id"] == "abc123"
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        """Test a full queue counts dropped records rather than waiting."""
+        handler = BoundedQueueHandler(queue.Queue(maxsize=1))
+
+        handler.emit(_record())
+        handler.emit(_record())
+        handler.emit(_record())
+
+        assert handler.queue.qsize() == 1
+        assert handler.dropped == 2
+
+    def test_request_id_echoed(self):
+        """Test the incoming X-Request-ID is echoed on the response."""
+        response = client.get("/api/v1/health", headers={"X-Request-ID": "req-1"})
+        assert response.headers["x-request-id"] == "req-1"
+
+        generated = client.get("/api/v1/health").headers["x-request-id"]
+        assert len(generated) == 32
+
+    def test_api_call_sampled_by_route_template(self, monkeypatch):
+        """Test api_call lines use the access log's route key for sampling."""
+        route = next(r for r in moods_router.routes if r.path == "/moods" and "POST" in r.methods)
+        scope = {"type": "http", "path": "/api/v1/moods", "route": route}
+        logged = []
+        monkeypatch.setattr(app_logging.logger, "info", lambda msg, extra: logged.append(extra))
+        token = app_logging._request_scope.set(scope)
+        try:
+            monkeypatch.setattr(app_logging, "_sample_rates", {"/api/v1/moods": 0.0})
+            log_api_call(user_id="42", extra={"action": "create"})
+            assert logged == []
+
+            monkeypatch.setattr(app_logging, "_sample_rates", {})
+            log_api_call(user_id="42", extra={"action": "create"})
+            assert logged[0]["path"] == "/api/v1/moods"
+        finally:
+            app_logging._request_scope.reset(token)
@@ -0,0 +1,129 @@
+from datetime import date
+
+import pytest
+
+# Import after conftest.py sets environment variables
+from app.database import engine
+from app.services.mood_partitions import (
+    add_months,
+    create_partition,
+    expire_partition,
+    maintain,
+    partition_month,
+    partition_name,
+    plan_partitions,
+)
+
+
+class _Result:
+    rowcount = 2
+
+    def __init__(self, value=None):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+
+class _RecordingConnection:
+    """Collects the SQL a partition helper issues."""
+
+    def __init__(self, scalar=None):
+        self.statements = []
+        self.scalar = scalar
+
+    def execute(self, statement, params=None):
+        self.statements.append((str(statement), params))
+        return _Result(self.scalar)
+
+
+class TestPartitionNames:
+    """Test cases for month arithmetic and partition naming."""
+
+    def test_add_months_across_years(self):
+        """Test months roll over into the next and previous year."""
+        assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+        assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+    def test_name_round_trip(self):
+        """Test partition names map back to their month."""
+        assert partition_name(date(2026, 3, 1)) == "mood_entries_p202603"
+        assert partition_month("mood_entries_p202603") == date(2026, 3, 1)
+        assert partition_month("mood_entries_default") is None
+
+
+class TestPlanPartitions:
+    """Test cases for deciding which partitions to create and expire."""
+
+    def test_premakes_upcoming_months(self):
+        """Test the current month and the next `premake` are created."""
+        plan = plan_partitions({date(2026, 10, 1)}, date(2026, 10, 17), premake=2, retention_months=0)
+        assert plan.create == [date(2026, 11, 1), date(2026, 12, 1)]
+        assert plan.expire == []
+
+    def test_expires_months_outside_retention(self):
+        """Test only months older than the retention window expire."""
+        existing = {add_months(date(2026, 1, 1), offset) for offset in range(10)}
+        plan = plan_partitions(existing, date(2026, 10, 17), premake=0, retention_months=6)
+        assert plan.expire == [date(2026, 1, 1), date(2026, 2, 1), date(2026, 3, 1), date(2026, 4, 1)]
+        assert plan.create == []
+
+
+class TestPartitionDDL:
+    """Test cases for the statements the maintenance steps run."""
+
+    def test_create_moves_rows_out_of_default(self):
+        """Test rows are moved from the default partition before attaching."""
+        conn = _RecordingConnection()
+        moved = create_partition(conn, date(2026, 12, 1))
+
+        sql = [statement for statement, _ in conn.statements]
+        assert moved == 2
+        assert sql[0].startswith("CREATE TABLE mood_entries_p202612 (LIKE mood_entries")
+        assert "DELETE FROM mood_entries_default" in sql[1]
+        assert conn.statements[1][1] == {
+            "lower": "2026-12-01T00:00:00+00:00",
+            "upper": "2027-01-01T00:00:00+00:00",
+        }
+        assert sql[2] == (
+            "ALTER TABLE mood_entries ATTACH PARTITION mood_entries_p202612"
+            " FOR VALUES FROM ('2026-12-01T00:00:00+00:00') TO ('2027-01-01T00:00:00+00:00')"
+        )
+
+    def test_expire_archives(self):
+        """Test an expired partition is detached and moved to the archive schema."""
+        conn = _RecordingConnection()
+        expire_partition(conn, date(2025, 1, 1), "archive", "archive")
+
+        sql = [statement for statement, _ in conn.statements]
+        assert sql == [
+            "ALTER TABLE mood_entries DETACH PARTITION mood_entries_p202501",
+            'CREATE SCHEMA IF NOT EXISTS "archive"',
+            "SELECT to_regclass(:name)",
+            'ALTER TABLE mood_entries_p202501 SET SCHEMA "archive"',
+        ]
+        assert conn.statements[2][1] == {"name": '"archive".mood_entries_p202501'}
+
+    def test_expire_merges_into_archived_month(self):
+        """Test re-archiving a month appends to the archived table instead of failing."""
+        conn = _RecordingConnection(scalar="archive.mood_entries_p202501")
+        expire_partition(conn, date(2025, 1, 1), "archive", "archive")
+
+        sql = [statement for statement, _ in conn.statements]
+        assert sql[-2:] == [
+            'INSERT INTO "archive".mood_entries_p202501 SELECT * FROM mood_entries_p202501',
+            "DROP TABLE mood_entries_p202501",
+        ]
+        assert not any("SET SCHEMA" in statement for statement in sql)
+
+    def test_expire_drops(self):
+        """Test the drop action deletes the detached partition."""
+        conn = _RecordingConnection()
+        expire_partition(conn, date(2025, 1, 1), "drop", "archive")
+
+        assert conn.statements[-1][0] == "DROP TABLE mood_entries_p202501"
+
+    def test_requires_postgres(self):
+        """Test maintenance refuses to run against other databases."""
+        with pytest.raises(RuntimeError):
+            maintain(engine, date.today(), premake=3, retention_months=0)
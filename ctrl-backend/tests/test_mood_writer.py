@@ -0,0 +1,91 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+# Import after conftest.py sets environment variables
+from app.database import Base, SessionLocal, engine
+from app.models.mood import MoodEntry
+from app.services.mood_writer import BatchRejected, MoodWriter
+
+
+@pytest.fixture
+def tables():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+def _row(score):
+    return {
+        "user_id": 1,
+        "mood_score": score,
+        "energy_level": 5,
+        "stress_level": 5,
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+async def _submit_all(writer, rows):
+    try:
+        return await asyncio.gather(*(writer.submit(row) for row in rows), return_exceptions=True)
+    finally:
+        await writer.stop()
+
+
+class TestMoodWriter:
+    """Test cases for group-committed mood inserts."""
+
+    def test_concurrent_submits_share_one_commit(self, tables):
+        """Test rows arriving within the window are written as one batch."""
+        writer = MoodWriter(window=0.05, max_rows=100)
+        ids = asyncio.run(_submit_all(writer, [_row(score) for score in range(1, 11)]))
+
+        assert writer.stats() == {"batches": 1, "rows": 10}
+        db = SessionLocal()
+        stored = {entry.id: entry.mood_score for entry in db.query(MoodEntry).all()}
+        db.close()
+        # Each request gets the id of its own row.
+        assert [stored[entry_id] for entry_id in ids] == list(range(1, 11))
+
+    def test_max_rows_splits_batches(self, tables):
+        """Test a batch is flushed as soon as max_rows is reached."""
+        writer = MoodWriter(window=1.0, max_rows=4)
+        ids = asyncio.run(_submit_all(writer, [_row(5) for _ in range(10)]))
+
+        assert len(set(ids)) == 10
+        assert writer.stats() == {"batches": 3, "rows": 10}
+
+    def test_bad_row_only_fails_its_own_request(self, tables, monkeypatch):
+        """Test a batch whose INSERT is rejected is retried row by row."""
+        writer = MoodWriter(window=0.05, max_rows=100)
+        insert = writer._insert
+
+        async def insert_rejecting_zero(rows):
+            if any(row["mood_score"] == 0 for row in rows):
+                raise BatchRejected() from ValueError("mood_score out of range")
+            return await insert(rows)
+
+        monkeypatch.setattr(writer, "_insert", insert_rejecting_zero)
+        results = asyncio.run(_submit_all(writer, [_row(3), _row(0), _row(4)]))
+
+        assert isinstance(results[1], ValueError)
+        assert all(isinstance(result, int) for result in (results[0], results[2]))
+        assert writer.stats()["rows"] == 2
+
+    def test_failed_commit_is_not_retried(self, tables, monkeypatch):
+        """Test a COMMIT with unknown outcome fails the batch without re-inserting."""
+        writer = MoodWriter(window=0.05, max_rows=100)
+        insert = writer._insert
+
+        async def insert_then_lose_connection(rows):
+            await insert(rows)
+            raise ConnectionError("connection lost during COMMIT")
+
+        monkeypatch.setattr(writer, "_insert", insert_then_lose_connection)
+        results = asyncio.run(_submit_all(writer, [_row(3), _row(4), _row(5)]))
+
+        assert all(isinstance(result, ConnectionError) for result in results)
+        db = SessionLocal()
+        assert db.query(MoodEntry).count() == 3
+        db.close()
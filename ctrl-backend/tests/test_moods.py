@@ -1,3 +1,5 @@
+from datetime import datetime, timedelta
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -10,6 +12,9 @@ from app.database import Base, get_db
 from app.models.user import User
 from app.models.mood import MoodEntry
 from app.auth import verify_token
+from app.services.idempotency import idempotency_store
+from app.services.principal_cache import firebase_user_ids
+from app.services.rate_limit import rate_limiter
 
 
 # Use the test database URL from environment (set in conftest.py)
@@ -55,6 +60,9 @@ def client(db_session):
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    rate_limiter.clear()
+    idempotency_store.clear()
+    firebase_user_ids.clear()
     yield TestClient(app)
     app.dependency_overrides.clear()
 
@@ -140,11 +148,69 @@ class TestCreateMood:
             headers={"Authorization": "Bearer fake-token"}
         )
         
-        # Should fail because required fields are missing
-        assert response.status_code in [422, 500]  # Validation error or KeyError
+        # Should fail validation because required fields are missing
+        assert response.status_code == 422
         
         app.dependency_overrides.clear()
 
+    def test_create_mood_with_device_time(self, client, db_session, test_user_with_firebase):
+        """Test an explicit created_at is stored instead of the receipt time."""
+        app.dependency_overrides[verify_token] = lambda: {"uid": "test-firebase-uid-123"}
+
+        response = client.post(
+            "/api/v1/moods",
+            json={
+                "mood_score": 7,
+                "energy_level": 6,
+                "stress_level": 3,
+                "created_at": "2024-03-01T08:30:00",
+            },
+        )
+
+        assert response.status_code == 200
+        entry = db_session.get(MoodEntry, int(response.json()["id"]))
+        assert entry.created_at.replace(tzinfo=None) == datetime(2024, 3, 1, 8, 30)
+
+        app.dependency_overrides.clear()
+
+    def test_create_mood_rejects_time_outside_retention(self, client, test_user_with_firebase, monkeypatch):
+        """Test created_at older than MOODS_RETENTION_MONTHS is refused."""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "MOODS_RETENTION_MONTHS", 12)
+        app.dependency_overrides[verify_token] = lambda: {"uid": "test-firebase-uid-123"}
+
+        response = client.post(
+            "/api/v1/moods",
+            json={
+                "mood_score": 7,
+                "energy_level": 6,
+                "stress_level": 3,
+                "created_at": "2020-03-01T08:30:00",
+            },
+        )
+
+        assert response.status_code == 422
+
+        app.dependency_overrides.clear()
+
+    def test_create_mood_group_commit(self, client, db_session, test_user_with_firebase, monkeypatch):
+        """Test the group-commit path acknowledges with the stored row's id."""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "MOODS_GROUP_COMMIT", True)
+        app.dependency_overrides[verify_token] = lambda: {"uid": "test-firebase-uid-123"}
+
+        response = client.post(
+            "/api/v1/moods",
+            json={"mood_score": 8, "energy_level": 4, "stress_level": 2},
+        )
+
+        assert response.status_code == 200
+        entry = db_session.get(MoodEntry, int(response.json()["id"]))
+        assert entry.user_id == test_user_with_firebase.id
+        assert entry.mood_score == 8
+
+        app.dependency_overrides.clear()
+
     def test_create_mood_no_auth(self, client):
         """Test mood creation without authentication."""
         # Don't override verify_token, let it fail
@@ -178,8 +244,8 @@ class TestCreateMood:
             headers={"Authorization": "Bearer fake-token"}
         )
         
-        # Should fail because user doesn't exist (user will be None)
-        assert response.status_code == 500  # AttributeError when accessing user.id
+        # Should fail because user doesn't exist
+        assert response.status_code == 404
         
         app.dependency_overrides.clear()
 
@@ -222,6 +288,76 @@ class TestCreateMood:
         app.dependency_overrides.clear()
 
 
+class TestCreateMoodIdempotency:
+    """Test cases for Idempotency-Key on POST /moods."""
+
+    def test_retry_replays_without_inserting(self, client, db_session, test_user_with_firebase):
+        """Test a retried request gets the first response and no duplicate row."""
+        app.dependency_overrides[verify_token] = lambda: {"uid": "test-firebase-uid-123"}
+        body = {"mood_score": 7, "energy_level": 6, "stress_level": 3}
+        headers = {"Idempotency-Key": "checkin-1"}
+
+        first = client.post("/api/v1/moods", json=body, headers=headers)
+        second = client.post("/api/v1/moods", json=body, headers=headers)
+
+        assert first.status_code == second.status_code == 200
+        assert first.json() == second.json()
+        assert second.headers["idempotent-replayed"] == "true"
+        assert db_session.query(MoodEntry).count() == 1
+
+        # A new key is a new check-in.
+        client.post("/api/v1/moods", json=body, headers={"Idempotency-Key": "checkin-2"})
+        assert db_session.query(MoodEntry).count() == 2
+
+        app.dependency_overrides.clear()
+
+    def test_key_reused_with_other_body(self, client, test_user_with_firebase):
+        """Test a key can't be replayed for a different payload."""
+        app.dependency_overrides[verify_token] = lambda: {"uid": "test-firebase-uid-123"}
+        headers = {"Idempotency-Key": "checkin-1"}
+
+        client.post("/api/v1/moods", json={"mood_score": 7, "energy_level": 6, "stress_level": 3}, headers=headers)
+        response = client.post(
+            "/api/v1/moods", json={"mood_score": 1, "energy_level": 6, "stress_level": 3}, headers=headers
+        )
+        assert response.status_code == 422
+
+        app.dependency_overrides.clear()
+
+    def test_keys_scoped_per_user(self, client, db_session, test_user_with_firebase, test_user_with_firebase_alt):
+        """Test the same key from two users creates two entries."""
+        body = {"mood_score": 7, "energy_level": 6, "stress_level": 3}
+        headers = {"Idempotency-Key": "checkin-1"}
+
+        for uid in ("test-firebase-uid-123", "test-firebase-uid-456"):
+            app.dependency_overrides[verify_token] = lambda uid=uid: {"uid": uid}
+            assert client.post("/api/v1/moods", json=body, headers=headers).status_code == 200
+
+        assert db_session.query(MoodEntry).count() == 2
+        app.dependency_overrides.clear()
+
+
+class TestCreateMoodRateLimit:
+    """Test cases for the per-user write limit on POST /moods."""
+
+    def test_create_mood_throttled_per_user(self, client, test_user_with_firebase, monkeypatch):
+        """Test a user over the write limit gets 429 while others are unaffected."""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "RATE_LIMIT_MOODS_WRITE_USER", "2/minute")
+        uid = {"uid": "test-firebase-uid-123"}
+        app.dependency_overrides[verify_token] = lambda: uid
+
+        body = {"mood_score": 7, "energy_level": 6, "stress_level": 3}
+        statuses = [client.post("/api/v1/moods", json=body).status_code for _ in range(3)]
+        assert statuses == [200, 200, 429]
+
+        # Another uid has its own bucket (404 here: it has no user row).
+        uid["uid"] = "someone-else"
+        assert client.post("/api/v1/moods", json=body).status_code == 404
+
+        app.dependency_overrides.clear()
+
+
 class TestListMoods:
     """Test cases for GET /moods endpoint."""
 
@@ -326,3 +462,341 @@ class TestListMoods:
         
         app.dependency_overrides.clear()
 
+    def test_list_moods_keyset_pagination(self, client, db_session, test_user_with_firebase):
+        """Test pages are newest first and chained through X-Next-Cursor."""
+        def mock_verify_token():
+            return {"uid": "test-firebase-uid-123", "email": "test@example.com"}
+
+        app.dependency_overrides[verify_token] = mock_verify_token
+
+        base = datetime(2026, 1, 1, 12, 0, 0)
+        for day in range(5):
+            db_session.add(MoodEntry(
+                user_id=test_user_with_firebase.id,
+                mood_score=day,
+                created_at=base + timedelta(days=day),
+            ))
+        # Same timestamp as the newest entry, so the id breaks the tie
+        db_session.add(MoodEntry(
+            user_id=test_user_with_firebase.id,
+            mood_score=5,
+            created_at=base + timedelta(days=4),
+        ))
+        db_session.commit()
+
+        headers = {"Authorization": "Bearer fake-token"}
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/api/v1/moods", params=params, headers=headers)
+            assert response.status_code == 200
+            seen.extend(item["mood"] for item in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+
+        assert seen == [5, 4, 3, 2, 1, 0]
+
+        app.dependency_overrides.clear()
+
+    def test_list_moods_pagination_default_timestamps(self, client, test_user_with_firebase):
+        """Test paging terminates over entries created without a device time."""
+        def mock_verify_token():
+            return {"uid": "test-firebase-uid-123", "email": "test@example.com"}
+
+        app.dependency_overrides[verify_token] = mock_verify_token
+
+        headers = {"Authorization": "Bearer fake-token"}
+        for score in range(5):
+            client.post(
+                "/api/v1/moods",
+                json={"mood_score": score, "energy_level": 5, "stress_level": 5},
+                headers=headers,
+            )
+
+        seen = []
+        cursor = None
+        for _ in range(5):
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/api/v1/moods", params=params, headers=headers)
+            seen.extend(item["mood"] for item in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+
+        assert cursor is None
+        assert seen == [4, 3, 2, 1, 0]
+
+        app.dependency_overrides.clear()
+
+    def test_list_moods_date_range(self, client, db_session, test_user_with_firebase):
+        """Test before/after restrict the listing to a time window."""
+        def mock_verify_token():
+            return {"uid": "test-firebase-uid-123", "email": "test@example.com"}
+
+        app.dependency_overrides[verify_token] = mock_verify_token
+
+        base = datetime(2026, 1, 1, 12, 0, 0)
+        for day in range(5):
+            db_session.add(MoodEntry(
+                user_id=test_user_with_firebase.id,
+                mood_score=day,
+                created_at=base + timedelta(days=day),
+            ))
+        db_session.commit()
+
+        response = client.get(
+            "/api/v1/moods",
+            params={"after": "2026-01-02T00:00:00", "before": "2026-01-04T00:00:00"},
+            headers={"Authorization": "Bearer fake-token"}
+        )
+
+        assert response.status_code == 200
+        assert [item["mood"] for item in response.json()] == [2, 1]
+
+        app.dependency_overrides.clear()
+
+    def test_list_moods_from_to(self, client, db_session, test_user_with_firebase):
+        """Test from/to are inclusive and a bare date covers the whole day."""
+        def mock_verify_token():
+            return {"uid": "test-firebase-uid-123", "email": "test@example.com"}
+
+        app.dependency_overrides[verify_token] = mock_verify_token
+
+        base = datetime(2026, 1, 1, 12, 0, 0)
+        for day in range(5):
+            db_session.add(MoodEntry(
+                user_id=test_user_with_firebase.id,
+                mood_score=day,
+                created_at=base + timedelta(days=day),
+            ))
+        db_session.commit()
+
+        response = client.get(
+            "/api/v1/moods",
+            params={"from": "2026-01-02", "to": "2026-01-04"},
+            headers={"Authorization": "Bearer fake-token"}
+        )
+        assert response.status_code == 200
+        assert [item["mood"] for item in response.json()] == [3, 2, 1]
+
+        response = client.get(
+            "/api/v1/moods",
+            params={"from": "2026-01-02T12:00:00", "to": "2026-01-03T12:00:00"},
+            headers={"Authorization": "Bearer fake-token"}
+        )
+        assert [item["mood"] for item in response.json()] == [2, 1]
+
+        app.dependency_overrides.clear()
+
+    def test_list_moods_etag(self, client, db_session, test_user_with_firebase):
+        """Test If-None-Match gets 304 until the user's entries change."""
+        def mock_verify_token():
+            return {"uid": "test-firebase-uid-123", "email": "test@example.com"}
+
+        app.dependency_overrides[verify_token] = mock_verify_token
+        headers = {"Authorization": "Bearer fake-token"}
+
+        db_session.add(MoodEntry(user_id=test_user_with_firebase.id, mood_score=7))
+        db_session.commit()
+
+        etag = client.get("/api/v1/moods", headers=headers).headers["etag"]
+
+        response = client.get("/api/v1/moods", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304
+
+        # A different page of the same data is a different representation
+        response = client.get("/api/v1/moods", params={"limit": 1}, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 200
+
+        db_session.add(MoodEntry(user_id=test_user_with_firebase.id, mood_score=8))
+        db_session.commit()
+
+        response = client.get("/api/v1/moods", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert len(response.json()) == 2
+        assert response.headers["etag"] != etag
+
+        app.dependency_overrides.clear()
+
+    def test_list_moods_invalid_cursor(self, client, db_session, test_user_with_firebase):
+        """Test a malformed cursor is rejected with 400."""
+        def mock_verify_token():
+            return {"uid": "test-firebase-uid-123", "email": "test@example.com"}
+
+        app.dependency_overrides[verify_token] = mock_verify_token
+
+        response = client.get(
+            "/api/v1/moods",
+            params={"cursor": "not-a-cursor"},
+            headers={"Authorization": "Bearer fake-token"}
+        )
+        assert response.status_code == 400
+
+        app.dependency_overrides.clear()
+
+
+class TestBatchMoods:
+    """Test cases for POST /moods/batch endpoint."""
+
+    def test_batch_create_success(self, client, db_session, test_user_with_firebase):
+        """Test every valid entry is stored and gets an id back."""
+        def mock_verify_token():
+            return {"uid": "test-firebase-uid-123", "email": "test@example.com"}
+
+        app.dependency_overrides[verify_token] = mock_verify_token
+
+        response = client.post(
+            "/api/v1/moods/batch",
+            json={"entries": [
+                {"mood_score": 7, "energy_level": 6, "stress_level": 3},
+                {"mood_score": 5, "energy_level": 4, "stress_level": 6,
+                 "created_at": "2026-01-01T08:30:00"},
+            ]},
+            headers={"Authorization": "Bearer fake-token"}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 2
+        assert data["failed"] == 0
+        assert [r["index"] for r in data["results"]] == [0, 1]
+        assert all(r["id"] for r in data["results"])
+
+        entries = db_session.query(MoodEntry).filter(MoodEntry.user_id == test_user_with_firebase.id).all()
+        assert sorted(e.mood_score for e in entries) == [5, 7]
+
+        app.dependency_overrides.clear()
+
+    def test_batch_reports_invalid_items(self, client, db_session, test_user_with_firebase):
+        """Test invalid entries are reported without rejecting the batch."""
+        def mock_verify_token():
+            return {"uid": "test-firebase-uid-123", "email": "test@example.com"}
+
+        app.dependency_overrides[verify_token] = mock_verify_token
+
+        response = client.post(
+            "/api/v1/moods/batch",
+            json={"entries": [
+                {"mood_score": 7, "energy_level": 6, "stress_level": 3},
+                {"mood_score": 7},
+                {"mood_score": 8, "energy_level": 7, "stress_level": 2},
+            ]},
+            headers={"Authorization": "Bearer fake-token"}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 2
+        assert data["failed"] == 1
+        assert data["results"][1]["id"] is None
+        assert "energy_level" in data["results"][1]["error"]
+        assert data["results"][2]["id"] is not None
+
+        app.dependency_overrides.clear()
+
+    def test_batch_too_large(self, client, db_session, test_user_with_firebase):
+        """Test batches above MOODS_BATCH_MAX are rejected."""
+        from app.core.config import settings
+
+        def mock_verify_token():
+            return {"uid": "test-firebase-uid-123", "email": "test@example.com"}
+
+        app.dependency_overrides[verify_token] = mock_verify_token
+
+        entry = {"mood_score": 7, "energy_level": 6, "stress_level": 3}
+        response = client.post(
+            "/api/v1/moods/batch",
+            json={"entries": [entry] * (settings.MOODS_BATCH_MAX + 1)},
+            headers={"Authorization": "Bearer fake-token"}
+        )
+        assert response.status_code == 422
+
+        app.dependency_overrides.clear()
+
+
+class TestExportMoods:
+    """Test cases for GET /moods/export endpoint."""
+
+    def _seed(self, db_session, user, count=3):
+        base = datetime(2026, 1, 1, 12, 0, 0)
+        for day in range(count):
+            db_session.add(MoodEntry(
+                user_id=user.id,
+                mood_score=day,
+                energy_level=5,
+                stress_level=2,
+                note=f"day {day}",
+                created_at=base + timedelta(days=day),
+            ))
+        db_session.commit()
+
+    def test_export_ndjson(self, client, db_session, test_user_with_firebase, test_user_with_firebase_alt):
+        """Test NDJSON export streams only the caller's rows, oldest first."""
+        import json
+
+        def mock_verify_token():
+            return {"uid": "test-firebase-uid-123", "email": "test@example.com"}
+
+        app.dependency_overrides[verify_token] = mock_verify_token
+        self._seed(db_session, test_user_with_firebase)
+        self._seed(db_session, test_user_with_firebase_alt, count=1)
+
+        response = client.get(
+            "/api/v1/moods/export",
+            headers={"Authorization": "Bearer fake-token"}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["mood_score"] for row in rows] == [0, 1, 2]
+        assert rows[0]["note"] == "day 0"
+        assert rows[0]["created_at"].startswith("2026-01-01T12:00:00")
+
+        app.dependency_overrides.clear()
+
+    def test_export_csv_gzip(self, client, db_session, test_user_with_firebase):
+        """Test CSV export with on-the-fly gzip."""
+        import csv
+
+        def mock_verify_token():
+            return {"uid": "test-firebase-uid-123", "email": "test@example.com"}
+
+        app.dependency_overrides[verify_token] = mock_verify_token
+        self._seed(db_session, test_user_with_firebase)
+
+        response = client.get(
+            "/api/v1/moods/export",
+            params={"format": "csv", "gzip": "true"},
+            headers={"Authorization": "Bearer fake-token"}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        rows = list(csv.reader(response.text.splitlines()))
+        assert rows[0][:4] == ["id", "mood_score", "energy_level", "stress_level"]
+        assert [row[1] for row in rows[1:]] == ["0", "1", "2"]
+
+        app.dependency_overrides.clear()
+
+    def test_export_invalid_format(self, client, db_session, test_user_with_firebase):
+        """Test unknown formats are rejected."""
+        def mock_verify_token():
+            return {"uid": "test-firebase-uid-123", "email": "test@example.com"}
+
+        app.dependency_overrides[verify_token] = mock_verify_token
+
+        response = client.get(
+            "/api/v1/moods/export",
+            params={"format": "xml"},
+            headers={"Authorization": "Bearer fake-token"}
+        )
+        assert response.status_code == 422
+
+        app.dependency_overrides.clear()
@@ -0,0 +1,47 @@
+from fastapi.testclient import TestClient
+
+# Import after conftest.py sets environment variables
+from app.main import app
+
+
+client = TestClient(app)
+
+
+class TestOpenAPI:
+    """Test cases for the cached /openapi.json endpoint."""
+
+    def test_openapi_served_with_etag(self):
+        """Test the corrected schema is served with a strong ETag."""
+        response = client.get("/openapi.json")
+        assert response.status_code == 200
+        assert response.headers["etag"].startswith('"')
+        assert "/api/v1/health" in response.json()["paths"]
+
+    def test_openapi_not_modified(self):
+        """Test a matching If-None-Match returns 304 without a body."""
+        etag = client.get("/openapi.json").headers["etag"]
+        response = client.get("/openapi.json", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_openapi_built_once(self):
+        """Test repeated hits reuse the cached bytes."""
+        client.get("/openapi.json")
+        cached = app.state.openapi_cache
+        client.get("/openapi.json")
+        assert app.state.openapi_cache is cached
+
+    def test_openapi_rebuilt_when_routes_change(self):
+        """Test adding a route invalidates the cached schema."""
+        etag = client.get("/openapi.json").headers["etag"]
+
+        @app.get("/api/v1/_openapi_probe")
+        def _probe():
+            return {}
+
+        try:
+            response = client.get("/openapi.json")
+            assert response.headers["etag"] != etag
+            assert "/api/v1/_openapi_probe" in response.json()["paths"]
+        finally:
+            app.router.routes.pop()
@@ -0,0 +1,78 @@
+import pytest
+from fastapi.testclient import TestClient
+
+# Import after conftest.py sets environment variables
+from app import prewarm
+from app.main import app
+from app.core.config import settings
+from app.database import Base, SessionLocal, engine
+from app.models.user import User
+from app.services.principal_cache import principal_cache
+
+
+@pytest.fixture
+def tables():
+    Base.metadata.create_all(bind=engine)
+    prewarm.readiness.reset()
+    principal_cache.clear()
+    yield
+    prewarm.readiness.reset()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def user(tables):
+    db = SessionLocal()
+    user = User(email="warm@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    db.close()
+    return user
+
+
+class TestReadiness:
+    """Test cases for startup prewarming and GET /ready."""
+
+    def test_ready_after_startup(self, user):
+        """Test the lifespan prewarm opens the pool and fills the principal cache."""
+        with TestClient(app) as client:
+            response = client.get("/api/v1/ready")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "ready"
+        assert data["steps"]["db_pool"]["connections"] == settings.DB_POOL_SIZE
+        assert data["steps"]["statements"]["ok"] is True
+        assert data["steps"]["principal_cache"]["loaded"] == 1
+        assert principal_cache.get(user.id).email == "warm@example.com"
+
+    def test_failed_step_retried_from_ready(self, tables, monkeypatch):
+        """Test /ready is 503 while a step fails and recovers once it passes."""
+        async def broken():
+            raise ConnectionError("database unavailable")
+
+        monkeypatch.setattr(prewarm, "_open_pool", broken)
+        with TestClient(app) as client:
+            response = client.get("/api/v1/ready")
+            assert response.status_code == 503
+            step = response.json()["steps"]["db_pool"]
+            assert step["ok"] is False
+            assert step["error"] == "ConnectionError"
+            # Liveness is unaffected.
+            assert client.get("/api/v1/health").status_code == 200
+
+            monkeypatch.undo()
+            monkeypatch.setattr(prewarm.readiness, "_last_attempt", 0.0)
+            response = client.get("/api/v1/ready")
+            assert response.status_code == 200
+            assert response.json()["steps"]["db_pool"]["ok"] is True
+
+    def test_disabled(self, tables, monkeypatch):
+        """Test PREWARM_ENABLED=false reports ready without doing any work."""
+        monkeypatch.setattr(settings, "PREWARM_ENABLED", False)
+        with TestClient(app) as client:
+            response = client.get("/api/v1/ready")
+
+        assert response.status_code == 200
+        assert response.json()["steps"] == {}
@@ -0,0 +1,119 @@
+from unittest.mock import patch
+
+import pytest
+
+# Import after conftest.py sets environment variables
+from app.database import Base, engine
+from app.services.rate_limit import RateLimit, RateLimitBackend, load_backend, parse_rate_limit
+from app.services.rate_limit_store import DatabaseTokenBucketStore
+from app.utils.token_bucket import TokenBucketStore
+
+
+@pytest.fixture
+def tables():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+def shared_test_backend():
+    """Stand-in "module:factory" target for load_backend()."""
+    return DatabaseTokenBucketStore(engine)
+
+
+class TestTokenBucketStore:
+    """Test cases for the sharded in-memory token buckets."""
+
+    def test_burst_then_refill(self):
+        """Test a full bucket allows `capacity` requests, then refills at `rate`."""
+        store = TokenBucketStore(shards=4)
+        with patch("app.utils.token_bucket.time.monotonic", return_value=100.0):
+            assert [store.take("k", rate=1.0, capacity=3) for _ in range(3)] == [0, 0, 0]
+            assert store.take("k", rate=1.0, capacity=3) == pytest.approx(1.0)
+
+        with patch("app.utils.token_bucket.time.monotonic", return_value=101.5):
+            assert store.take("k", rate=1.0, capacity=3) == 0
+            assert store.take("k", rate=1.0, capacity=3) == pytest.approx(0.5)
+
+    def test_keys_are_independent(self):
+        """Test spending one key's tokens leaves others untouched."""
+        store = TokenBucketStore()
+        assert store.take("a", rate=0.1, capacity=1) == 0
+        assert store.take("a", rate=0.1, capacity=1) > 0
+        assert store.take("b", rate=0.1, capacity=1) == 0
+
+    def test_bounded_size(self):
+        """Test each shard evicts its least recently used bucket."""
+        store = TokenBucketStore(shards=2, max_keys=10)
+        for i in range(100):
+            store.take(f"key-{i}", rate=1.0, capacity=1)
+        assert len(store) <= 10
+
+
+class TestParseRateLimit:
+    """Test cases for the Settings rate limit format."""
+
+    def test_formats(self):
+        """Test count/unit and count/multiple-unit forms."""
+        assert parse_rate_limit("10/minute") == RateLimit(10, 60)
+        assert parse_rate_limit("100 / 5minutes") == RateLimit(100, 300)
+        assert parse_rate_limit("3/second").rate == 3
+
+    def test_disabled_values(self):
+        """Test empty and zero limits mean no limit."""
+        assert parse_rate_limit("") is None
+        assert parse_rate_limit("0/minute") is None
+
+    def test_invalid(self):
+        """Test a malformed limit fails loudly."""
+        with pytest.raises(ValueError):
+            parse_rate_limit("ten per minute")
+
+
+class TestDatabaseTokenBucketStore:
+    """Test cases for the buckets shared through the database."""
+
+    def test_budget_shared_between_workers(self, tables):
+        """Test two stores (as two workers) spend the same bucket."""
+        worker_a = DatabaseTokenBucketStore(engine)
+        worker_b = DatabaseTokenBucketStore(engine)
+
+        assert worker_a.take("k", rate=0.01, capacity=2) == 0
+        assert worker_b.take("k", rate=0.01, capacity=2) == 0
+        assert worker_a.take("k", rate=0.01, capacity=2) > 0
+        assert worker_b.take("other", rate=0.01, capacity=2) == 0
+
+    def test_refill(self, tables):
+        """Test the bucket refills at `rate` from its stored timestamp."""
+        store = DatabaseTokenBucketStore(engine)
+        with patch("app.services.rate_limit_store.time.time", return_value=1000.0):
+            assert store.take("k", rate=1.0, capacity=1) == 0
+            assert store.take("k", rate=1.0, capacity=1) == pytest.approx(1.0)
+        with patch("app.services.rate_limit_store.time.time", return_value=1001.0):
+            assert store.take("k", rate=1.0, capacity=1) == 0
+
+    def test_fails_open_without_table(self):
+        """Test an unreachable store lets the request through."""
+        Base.metadata.drop_all(bind=engine)
+        assert DatabaseTokenBucketStore(engine).take("k", rate=1.0, capacity=1) == 0
+
+
+class TestLoadBackend:
+    """Test cases for choosing the backend from RATE_LIMIT_BACKEND."""
+
+    def test_builtin_backends(self):
+        """Test the named backends satisfy the protocol."""
+        assert isinstance(load_backend("memory"), TokenBucketStore)
+        assert isinstance(load_backend("database"), DatabaseTokenBucketStore)
+
+    def test_factory_path(self, tables):
+        """Test a module:factory path is loaded and used."""
+        backend = load_backend("tests.test_rate_limit:shared_test_backend")
+        assert isinstance(backend, RateLimitBackend)
+        assert backend.take("k", rate=1.0, capacity=1) == 0
+
+    def test_invalid_paths_fail_clearly(self):
+        """Test misconfigurations raise a ValueError naming the setting."""
+        for spec in ("redis", "no_such_module:factory", "app.utils.token_bucket:missing", "builtins:object"):
+            with pytest.raises(ValueError, match="RATE_LIMIT_BACKEND"):
+                load_backend(spec)
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+class TestColdImport:
+    """Test cases for what importing the app pulls in."""
+
+    def test_firebase_sdk_not_imported_at_startup(self):
+        """Test firebase_admin is only imported on first use."""
+        result = subprocess.run(
+            [
+                sys.executable, "-c",
+                "import sys, app.main; print('firebase_admin' in sys.modules)",
+            ],
+            cwd=BACKEND_DIR,
+            env=os.environ.copy(),
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "False"
+
+    def test_no_output_on_import(self):
+        """Test importing the settings prints nothing (no DEBUG lines)."""
+        result = subprocess.run(
+            [sys.executable, "-c", "import app.core.config"],
+            cwd=BACKEND_DIR,
+            env=os.environ.copy(),
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout == ""
@@ -0,0 +1,120 @@
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+# Import after conftest.py sets environment variables
+from jose import jwt
+
+from app.auth import revoked_sessions, verify_token, token_cache
+from app.services.token_cache import TokenCache
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    token_cache.clear()
+    revoked_sessions.clear()
+    yield
+    token_cache.clear()
+    revoked_sessions.clear()
+
+
+def _claims(ttl=3600):
+    return {"uid": "test-firebase-uid-123", "exp": int(time.time()) + ttl}
+
+
+class TestTokenCache:
+    """Test cases for the TTL/LRU token cache."""
+
+    def test_hit_and_miss_counters(self):
+        """Test lookups are counted as hits and misses."""
+        cache = TokenCache(max_size=10)
+        assert cache.get("token") is None
+        cache.put("token", _claims())
+        assert cache.get("token")["uid"] == "test-firebase-uid-123"
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_expired_entries_are_not_returned(self):
+        """Test claims are dropped once the token's exp has passed."""
+        cache = TokenCache(max_size=10)
+        cache.put("token", _claims(ttl=-1))
+        assert cache.get("token") is None
+
+    def test_lru_eviction(self):
+        """Test the least recently used token is evicted first."""
+        cache = TokenCache(max_size=2)
+        cache.put("a", _claims())
+        cache.put("b", _claims())
+        cache.get("a")
+        cache.put("c", _claims())
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+
+
+class TestVerifyTokenCaching:
+    """Test cases for verify_token's use of the cache."""
+
+    def test_repeated_token_verified_once(self):
+        """Test the same token is only verified by Firebase once."""
+        with patch("firebase_admin.auth.verify_id_token", return_value=_claims()) as verify:
+            first = verify_token("Bearer same-token")
+            second = verify_token("Bearer same-token")
+
+        assert first == second
+        assert verify.call_count == 1
+
+    def test_revocation_sampling_bypasses_cache(self, monkeypatch):
+        """Test sampled requests re-verify with check_revoked."""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "FIREBASE_REVOCATION_SAMPLE_RATE", 1.0)
+
+        with patch("firebase_admin.auth.verify_id_token", return_value=_claims()) as verify:
+            verify_token("Bearer same-token")
+            verify_token("Bearer same-token")
+
+        assert verify.call_count == 2
+        assert verify.call_args.kwargs["check_revoked"] is True
+
+    def test_revoked_token_is_evicted(self, monkeypatch):
+        """Test a failed re-verification drops the cached claims."""
+        from app.core.config import settings
+
+        with patch("firebase_admin.auth.verify_id_token", return_value=_claims()):
+            verify_token("Bearer same-token")
+
+        monkeypatch.setattr(settings, "FIREBASE_REVOCATION_SAMPLE_RATE", 1.0)
+        with patch("firebase_admin.auth.verify_id_token", side_effect=ValueError("revoked")):
+            with pytest.raises(HTTPException):
+                verify_token("Bearer same-token")
+
+        assert token_cache.stats()["size"] == 0
+
+    def test_revocation_outlives_sampled_request(self, monkeypatch):
+        """Test a revoked session stays refused on unsampled requests."""
+        from firebase_admin.auth import RevokedIdTokenError
+        from app.core.config import settings
+
+        claims = {**_claims(), "sub": "test-firebase-uid-123", "auth_time": 1000}
+        token = jwt.encode(claims, "test-secret", algorithm="HS256")
+        with patch("firebase_admin.auth.verify_id_token", return_value=claims):
+            verify_token(f"Bearer {token}")
+
+        monkeypatch.setattr(settings, "FIREBASE_REVOCATION_SAMPLE_RATE", 1.0)
+        with patch("firebase_admin.auth.verify_id_token", side_effect=RevokedIdTokenError("revoked")):
+            with pytest.raises(HTTPException):
+                verify_token(f"Bearer {token}")
+
+        monkeypatch.setattr(settings, "FIREBASE_REVOCATION_SAMPLE_RATE", 0.0)
+        with patch("firebase_admin.auth.verify_id_token", return_value=claims):
+            with pytest.raises(HTTPException):
+                verify_token(f"Bearer {token}")
+
+        # A fresh sign-in after the revocation is accepted.
+        later = {**claims, "auth_time": 2000}
+        with patch("firebase_admin.auth.verify_id_token", return_value=later):
+            assert verify_token(f"Bearer {jwt.encode(later, 'test-secret', algorithm='HS256')}")
+
+        assert token_cache.get(token) is None
@@ -3,13 +3,13 @@ from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
-from unittest.mock import patch
 
 # Import after conftest.py sets environment variables
 from app.main import app
 from app.database import Base, get_db
 from app.models.user import User
 from app.auth import verify_token
+from app.services.principal_cache import firebase_user_ids
 
 
 # Use the test database URL from environment (set in conftest.py)
@@ -55,6 +55,7 @@ def client(db_session):
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    firebase_user_ids.clear()
     yield TestClient(app)
     app.dependency_overrides.clear()
 
@@ -100,12 +101,10 @@ class TestGetMe:
         
         app.dependency_overrides[verify_token] = mock_verify_token
         
-        # Patch SessionLocal to use test database session
-        with patch('app.routers.users.SessionLocal', return_value=db_session):
-            response = client.get(
-                "/api/v1/me",
-                headers={"Authorization": "Bearer fake-token"}
-            )
+        response = client.get(
+            "/api/v1/me",
+            headers={"Authorization": "Bearer fake-token"}
+        )
         
         assert response.status_code == 200
         data = response.json()
@@ -122,12 +121,10 @@ class TestGetMe:
         
         app.dependency_overrides[verify_token] = mock_verify_token
         
-        # Patch SessionLocal to use test database session
-        with patch('app.routers.users.SessionLocal', return_value=db_session):
-            response = client.get(
-                "/api/v1/me",
-                headers={"Authorization": "Bearer fake-token"}
-            )
+        response = client.get(
+            "/api/v1/me",
+            headers={"Authorization": "Bearer fake-token"}
+        )
         
         assert response.status_code == 200
         data = response.json()
@@ -185,12 +182,10 @@ class TestGetMe:
         
         app.dependency_overrides[verify_token] = mock_verify_token
         
-        # Patch SessionLocal to use test database session
-        with patch('app.routers.users.SessionLocal', return_value=db_session):
-            response = client.get(
-                "/api/v1/me",
-                headers={"Authorization": "Bearer fake-token"}
-            )
+        response = client.get(
+            "/api/v1/me",
+            headers={"Authorization": "Bearer fake-token"}
+        )
         
         assert response.status_code == 200
         data = response.json()
@@ -209,29 +204,27 @@ class TestGetMe:
         
         app.dependency_overrides[verify_token] = mock_verify_token
         
-        # Patch SessionLocal to use test database session
-        with patch('app.routers.users.SessionLocal', return_value=db_session):
-            # First call - should create user
-            response1 = client.get(
-                "/api/v1/me",
-                headers={"Authorization": "Bearer fake-token"}
-            )
-            assert response1.status_code == 200
-            data1 = response1.json()
-            user_id_1 = data1["id"]
-            
-            # Second call - should return same user
-            response2 = client.get(
-                "/api/v1/me",
-                headers={"Authorization": "Bearer fake-token"}
-            )
-            assert response2.status_code == 200
-            data2 = response2.json()
-            user_id_2 = data2["id"]
-            
-            # Should be the same user
-            assert user_id_1 == user_id_2
-            assert data1["firebase_uid"] == data2["firebase_uid"]
+        # First call - should create user
+        response1 = client.get(
+            "/api/v1/me",
+            headers={"Authorization": "Bearer fake-token"}
+        )
+        assert response1.status_code == 200
+        data1 = response1.json()
+        user_id_1 = data1["id"]
+        
+        # Second call - should return same user
+        response2 = client.get(
+            "/api/v1/me",
+            headers={"Authorization": "Bearer fake-token"}
+        )
+        assert response2.status_code == 200
+        data2 = response2.json()
+        user_id_2 = data2["id"]
+        
+        # Should be the same user
+        assert user_id_1 == user_id_2
+        assert data1["firebase_uid"] == data2["firebase_uid"]
         
         app.dependency_overrides.clear()
 
@@ -242,11 +235,10 @@ class TestGetMe:
         
         app.dependency_overrides[verify_token] = mock_verify_token
         
-        with patch('app.routers.users.SessionLocal', return_value=db_session):
-            response = client.get(
-                "/api/v1/me",
-                headers={"Authorization": "Bearer fake-token"}
-            )
+        response = client.get(
+            "/api/v1/me",
+            headers={"Authorization": "Bearer fake-token"}
+        )
         
         assert response.status_code == 200
         data = response.json()
@@ -262,3 +254,34 @@ class TestGetMe:
         
         app.dependency_overrides.clear()
 
+
+class TestFirebaseUidCache:
+    """Test cases for the firebase uid -> user id cache."""
+
+    def test_repeat_calls_skip_lookup(self, client, test_user_with_firebase, monkeypatch):
+        """Test the second /me call is answered from the cache."""
+        app.dependency_overrides[verify_token] = lambda: {"uid": "test-firebase-uid-123"}
+        headers = {"Authorization": "Bearer fake-token"}
+        client.get("/api/v1/me", headers=headers)
+
+        async def fail(*args):
+            raise AssertionError("user lookup should be cached")
+
+        monkeypatch.setattr("app.routers.users._get_user_by_firebase_uid", fail)
+        response = client.get("/api/v1/me", headers=headers)
+
+        assert response.status_code == 200
+        assert response.json()["id"] == str(test_user_with_firebase.id)
+        app.dependency_overrides.clear()
+
+    def test_dropped_on_delete(self, client, db_session, test_user_with_firebase):
+        """Test deleting the user drops its cached id."""
+        app.dependency_overrides[verify_token] = lambda: {"uid": "test-firebase-uid-123"}
+        client.get("/api/v1/me", headers={"Authorization": "Bearer fake-token"})
+        assert firebase_user_ids.get("test-firebase-uid-123") == test_user_with_firebase.id
+
+        db_session.delete(test_user_with_firebase)
+        db_session.commit()
+
+        assert firebase_user_ids.get("test-firebase-uid-123") is None
+        app.dependency_overrides.clear()